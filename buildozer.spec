@@ -27,7 +27,7 @@ source.exclude_dirs = tests, bin, venv
 # (list) List of exclusions using pattern matching
 # Do not prefix with './'
 #source.exclude_patterns = license,images/*/*.jpg
-source.exclude_patterns = **/pycache/, **/.pyc, **/.pyo, **/.pyx, **/*.pxd, **/tests/*
+source.exclude_patterns = **/pycache/, **/.pyc, **/.pyo, **/.pyx, **/*.pxd, **/tests/*, simulation.py, fake_gemini.py
 
 # (str) Application versioning (method 1)
 version = 3.1
@@ -38,7 +38,7 @@ version = 3.1
 
 # (list) Application requirements
 # comma separated e.g. requirements = sqlite3,kivy
-requirements = python3,kivy,requests
+requirements = python3,kivy,requests,sqlite3
 
 # (str) Custom source folders for requirements
 # Sets custom source for any requirements with recipes
@@ -0,0 +1,334 @@
+"""
+Local stand-in for the Gemini generateContent API.
+
+Serves POST /v1beta/models/<model>:generateContent and
+:streamGenerateContent?alt=sse with made-up but well-formed word lists, so the
+generation pipeline can be exercised and benchmarked without network access or
+quota. Latency, server errors, 429s (with Retry-After) and malformed payloads
+are injected at configurable rates. Single-category prompts get {"words": [...]}
+and batch prompts get one array per category in the request's response schema.
+
+Point the app at it with GEMINI_API_BASE:
+
+    python fake_gemini.py serve --port 8765 --latency 0.3 --error-rate 0.05 --throttle-rate 0.05
+    GEMINI_API_BASE=http://127.0.0.1:8765 python main.py
+
+and measure client throughput against it with:
+
+    python fake_gemini.py bench --requests 500 --concurrency 8
+
+tests/test_fake_gemini.py uses it as a regression check for the request path
+(payload, retries on 429, malformed replies, parsing the words):
+
+    python -m pytest -q tests
+
+Development tool only: it is not part of the Android build.
+"""
+import argparse
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gemini_client import GeminiClient, GeminiError, TokenBucket, WordStreamParser, event_text
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MODEL = 'gemini-2.5-flash'
+WORDS_PER_CATEGORY = 10
+STREAM_CHUNK_SIZE = 12 # Characters of JSON text per streamed event
+
+QUOTED_CATEGORY = re.compile(r"'([^']+)'")
+REQUESTED_COUNT = re.compile(r"Generate (\d+) ")
+
+
+class FaultConfig:
+    """Latency and failure injection settings shared by every request."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, malformed_rate=0.0,
+                 retry_after=1, stream_delay=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.malformed_rate = malformed_rate
+        self.retry_after = retry_after
+        self.stream_delay = stream_delay
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {'requests': 0, 'ok': 0, 'errors': 0, 'throttled': 0, 'malformed': 0}
+
+    def roll(self):
+        """Picks this request's fate and latency: ('ok' | 'errors' | 'throttled' | 'malformed', seconds)."""
+        with self.lock:
+            self.counts['requests'] += 1
+            delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+            draw = self.rng.random()
+            if draw < self.throttle_rate:
+                outcome = 'throttled'
+            elif draw < self.throttle_rate + self.error_rate:
+                outcome = 'errors'
+            elif draw < self.throttle_rate + self.error_rate + self.malformed_rate:
+                outcome = 'malformed'
+            else:
+                outcome = 'ok'
+            self.counts[outcome] += 1
+            return outcome, delay
+
+
+def requested_categories(payload):
+    """Category names of a request: the batch schema's properties, or the quoted name in the prompt."""
+    schema = payload.get('generationConfig', {}).get('responseSchema', {})
+    properties = list(schema.get('properties', {}))
+    if properties and properties != ['words']:
+        return properties
+    try:
+        prompt = payload['contents'][0]['parts'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        prompt = ''
+    match = QUOTED_CATEGORY.search(prompt)
+    return [match.group(1) if match else 'Unknown']
+
+
+def requested_count(payload):
+    """Words asked for per category ("Generate N ..."), WORDS_PER_CATEGORY if the prompt does not say."""
+    try:
+        match = REQUESTED_COUNT.search(payload['contents'][0]['parts'][0]['text'])
+    except (KeyError, IndexError, TypeError):
+        match = None
+    return int(match.group(1)) if match else WORDS_PER_CATEGORY
+
+
+def fake_words(category_name, rng, count=WORDS_PER_CATEGORY):
+    return [f"{category_name} Item {rng.randrange(10000):04d}" for _ in range(count)]
+
+
+def response_text(payload, rng):
+    categories = requested_categories(payload)
+    schema_properties = payload.get('generationConfig', {}).get('responseSchema', {}).get('properties', {})
+    if 'words' in schema_properties:
+        return json.dumps({'words': fake_words(categories[0], rng, requested_count(payload))}, ensure_ascii=False)
+    return json.dumps({name: fake_words(name, rng) for name in categories}, ensure_ascii=False)
+
+
+def wrap_text(text):
+    return {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}}]}
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    server_version = 'FakeGemini/1.0'
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = self.path.split('?', 1)[0]
+        if not (path.endswith(':generateContent') or path.endswith(':streamGenerateContent')):
+            self.send_json(404, {'error': {'code': 404, 'message': 'Unknown method.'}})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self.send_json(400, {'error': {'code': 400, 'message': 'Invalid JSON payload.'}})
+            return
+
+        faults = self.server.faults
+        outcome, delay = faults.roll()
+        time.sleep(delay)
+
+        if outcome == 'throttled':
+            self.send_json(429, {'error': {'code': 429, 'message': 'Resource has been exhausted.'}},
+                           headers={'Retry-After': str(faults.retry_after)})
+            return
+        if outcome == 'errors':
+            self.send_json(503, {'error': {'code': 503, 'message': 'The model is overloaded.'}})
+            return
+
+        with faults.lock:
+            text = response_text(payload, faults.rng)
+        if outcome == 'malformed':
+            text = text[:len(text) // 2] # Truncated JSON, as from a cut-off generation
+
+        if path.endswith(':streamGenerateContent'):
+            self.send_stream(text, faults.stream_delay)
+        else:
+            self.send_json(200, wrap_text(text))
+
+    def send_json(self, status, document, headers=None):
+        data = json.dumps(document, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_stream(self, text, stream_delay):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream') # No charset: SSE is UTF-8 by definition
+        self.send_header('Connection', 'close') # No Content-Length; the stream ends with the connection
+        self.end_headers()
+        for start in range(0, len(text), STREAM_CHUNK_SIZE):
+            event = wrap_text(text[start:start + STREAM_CHUNK_SIZE])
+            # Raw UTF-8 rather than \u escapes, as the real API sends it
+            self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\r\n\r\n".encode('utf-8'))
+            self.wfile.flush()
+            if stream_delay:
+                time.sleep(stream_delay)
+        self.close_connection = True
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, faults=None, verbose=False):
+    """Builds (but does not start) a threaded fake server; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.faults = faults or FaultConfig()
+    server.verbose = verbose
+    return server
+
+
+def start_in_background(**kwargs):
+    """Starts a fake server on a daemon thread and returns (server, base_url)."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def bench_payload(category_name):
+    return {
+        'contents': [{'parts': [{'text': f"Generate 10 unique words for the category: '{category_name}'."}]}],
+        'generationConfig': {
+            'responseMimeType': 'application/json',
+            'responseSchema': {'type': 'OBJECT', 'properties': {'words': {'type': 'ARRAY', 'items': {'type': 'STRING'}}}},
+        },
+    }
+
+
+def run_bench(base_url, requests_count, concurrency, stream=False, model=DEFAULT_MODEL, rate=None):
+    """Drives GeminiClient against base_url and returns throughput, latency percentiles and outcomes."""
+    method = 'streamGenerateContent?alt=sse&' if stream else 'generateContent?'
+    url = f"{base_url}/v1beta/models/{model}:{method}key=bench"
+    # Rate limiting is off by default so the bench measures the pipeline, not the limiter
+    client = GeminiClient(pool_size=concurrency, rate_limiter=TokenBucket(rate=rate or 1e9, capacity=max(1, concurrency)))
+    outcomes = {'ok': 0, 'failed': 0, 'malformed': 0}
+    latencies = []
+    lock = threading.Lock()
+
+    def one(i):
+        payload = bench_payload(f"Bench {i % 20}")
+        started = time.perf_counter()
+        try:
+            if stream:
+                parser = WordStreamParser()
+                for event in client.stream_events(url, payload):
+                    parser.feed(event_text(event))
+                text = parser.full_text()
+            else:
+                text = client.post_json(url, payload)['candidates'][0]['content']['parts'][0]['text']
+            outcome = 'ok' if json.loads(text).get('words') else 'malformed'
+        except GeminiError:
+            outcome = 'failed'
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            outcome = 'malformed'
+        elapsed = time.perf_counter() - started
+        with lock:
+            outcomes[outcome] += 1
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_count)))
+    wall = time.perf_counter() - started
+    client.close()
+
+    latencies.sort()
+    return {
+        'requests': requests_count,
+        'seconds': round(wall, 3),
+        'throughput': round(requests_count / wall, 1) if wall else 0.0,
+        'p50_ms': round(1000 * statistics.median(latencies), 1),
+        'p95_ms': round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 1),
+        'outcomes': outcomes,
+        'client': client.state(),
+    }
+
+
+def add_fault_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every request.")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Uniform +/- seconds around --latency.")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with HTTP 503.")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Share of requests answered with HTTP 429.")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Share of responses with truncated JSON text.")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s.")
+    parser.add_argument('--stream-delay', type=float, default=0.0, help="Seconds between streamed events.")
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini generateContent API.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="Run the fake API until interrupted.")
+    serve.add_argument('--host', default=DEFAULT_HOST)
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--verbose', action='store_true', help="Log every request.")
+    add_fault_arguments(serve)
+
+    bench = commands.add_parser('bench', help="Benchmark GeminiClient against an in-process fake API.")
+    bench.add_argument('--requests', type=int, default=200)
+    bench.add_argument('--concurrency', type=int, default=4)
+    bench.add_argument('--stream', action='store_true', help="Use streamGenerateContent.")
+    bench.add_argument('--rate', type=float, default=None, help="Client token bucket rate (default: unlimited).")
+    bench.add_argument('--base-url', default=None, help="Benchmark an already running server instead.")
+    add_fault_arguments(bench)
+    return parser
+
+
+def fault_config(args):
+    return FaultConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, malformed_rate=args.malformed_rate,
+        retry_after=args.retry_after, stream_delay=args.stream_delay, seed=args.seed,
+    )
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    if args.command == 'serve':
+        server = make_server(args.host, args.port, fault_config(args), verbose=args.verbose)
+        print(f"Fake Gemini API on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print(json.dumps(server.faults.counts))
+            server.server_close()
+        return
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_in_background(port=0, faults=fault_config(args))
+    try:
+        result = run_bench(base_url, args.requests, args.concurrency, stream=args.stream, rate=args.rate)
+    finally:
+        if server is not None:
+            server.shutdown()
+    if server is not None:
+        result['server'] = server.faults.counts
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
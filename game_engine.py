@@ -0,0 +1,373 @@
+"""
+Headless rules engine for Word Spyfall.
+
+GameEngine holds the state of a single game (roles, eliminations, round
+starters and Single Round accusations) and returns plain outcome events
+instead of opening popups. It has no Kivy dependency, so it can run without
+a window for simulations, load tests and server hosting. SpyGame in main.py
+is a thin view that renders these events.
+"""
+import math
+import random
+
+# --- Game Modes ---
+MODE_EASY = "EASY"
+MODE_HARD = "HARD"
+MODE_SINGLE_ROUND = "SINGLE_ROUND"
+GAME_MODES = (MODE_EASY, MODE_HARD, MODE_SINGLE_ROUND)
+
+# --- Winners (as displayed by the result popup) ---
+WINNER_LOCALS = "Locals"
+WINNER_SPY = "Spy"
+
+# --- Outcome Events ---
+EVENT_SPY_CAUGHT = "SPY_CAUGHT"                    # Easy Mode: caught Spy gets a final guess
+EVENT_SPY_ELIMINATED = "SPY_ELIMINATED"            # Hard Mode: Spy removed, game continues
+EVENT_LOCAL_ELIMINATED = "LOCAL_ELIMINATED"        # Wrong accusation, game continues
+EVENT_SPY_GUESS_FAILED = "SPY_GUESS_FAILED"        # Easy Mode: wrong final guess, game continues
+EVENT_ACCUSATION_RECORDED = "ACCUSATION_RECORDED"  # Single Round: more accusations required
+EVENT_GAME_OVER = "GAME_OVER"
+
+# --- Game Over Reasons ---
+REASON_ALL_SPIES_CAUGHT = "ALL_SPIES_CAUGHT"
+REASON_PARITY = "PARITY"
+REASON_SPY_GUESSED_WORD = "SPY_GUESSED_WORD"
+REASON_PERFECT_ACCUSATION = "PERFECT_ACCUSATION"
+REASON_MISSION_FAILED = "MISSION_FAILED"
+
+# --- Round Directions ---
+DIRECTION_CLOCKWISE = "CLOCKWISE"
+DIRECTION_COUNTER_CLOCKWISE = "COUNTER-CLOCKWISE"
+ROUND_DIRECTIONS = (DIRECTION_CLOCKWISE, DIRECTION_COUNTER_CLOCKWISE)
+
+MIN_PLAYERS = 3
+LOCAL_START_SKEW = 0.85 # Chance to re-roll a Spy who was drawn to start Round 1
+
+
+def max_spies_for(player_count):
+    """Maximum number of spies allowed for a player count (1 per 3 players)."""
+    return math.floor(player_count / 3)
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def bit_indices(mask):
+    """Yields the player indices set in a bitmask, lowest first."""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+class Player:
+    """Per-player record. Roles and elimination live in the engine's bitmasks."""
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Player({self.name!r})"
+
+
+class GameEngine:
+    """
+    Kivy-free game state and rules. Every rule method returns an outcome event
+    (a plain dict with an 'event' key) or None, and never touches the UI.
+
+    Player state is kept as integer bitmasks (bit i = player i): spy_mask for
+    roles, active_mask for players still in play and accused_mask for Single
+    Round accusations.
+
+    Turn order uses an active-player ring: next_seat/prev_seat link the active
+    players around the table (clockwise = increasing index) and are unlinked
+    on elimination, while active_order/active_pos hold the active players
+    densely (swap-remove) for O(1) random round starters.
+    """
+
+    def __init__(self, rng=None, debug=False):
+        # A private Random instance lets simulations run with deterministic seeds
+        self.rng = rng or random.Random()
+        # Debug mode re-validates the incremental counters against a full scan after every change
+        self.debug = debug
+        self.reset()
+
+    def reset(self):
+        self.game_mode = MODE_EASY
+        self.players = []
+        self.spy_count = 0
+        self.spy_mask = 0
+        self.active_mask = 0
+        self.accused_mask = 0
+        self.accused_count = 0
+        # Incremental counters, updated on elimination instead of rescanning every player
+        self.active_spies = 0
+        self.active_locals = 0
+        self.category = ""
+        self.secret_word = ""
+        self.role_reveal_order = []
+        self.first_round_starter_index = 0
+        self.round_direction = DIRECTION_CLOCKWISE
+        self.next_seat = []
+        self.prev_seat = []
+        self.active_order = []
+        self.active_pos = []
+        self.winner = None
+
+    # --- Setup ---
+    def new_game(self, player_names, spy_count, game_mode=MODE_EASY, category="", secret_word=""):
+        """Assigns roles, the reveal order and the Round 1 starter for a new game."""
+        player_count = len(player_names)
+        if game_mode not in GAME_MODES:
+            raise ValueError(f"Unknown game mode: {game_mode}")
+        if player_count < MIN_PLAYERS:
+            raise ValueError(f"At least {MIN_PLAYERS} players are required.")
+        if not 1 <= spy_count <= max(1, max_spies_for(player_count)):
+            raise ValueError(f"Invalid spy count {spy_count} for {player_count} players.")
+
+        self.game_mode = game_mode
+        self.spy_count = spy_count
+        self.category = category
+        self.secret_word = secret_word
+        self.begin_single_round_accusations()
+        self.winner = None
+
+        # Initialize all players as active, then assign roles (multiple spies)
+        self.players = [Player(name) for name in player_names]
+        self.active_mask = (1 << player_count) - 1
+        self.spy_mask = 0
+        for i in self.rng.sample(range(player_count), spy_count):
+            self.spy_mask |= 1 << i
+        self.active_spies = spy_count
+        self.active_locals = player_count - spy_count
+
+        # Active-player ring around the table plus the dense active list
+        self.next_seat = [(i + 1) % player_count for i in range(player_count)]
+        self.prev_seat = [(i - 1) % player_count for i in range(player_count)]
+        self.active_order = list(range(player_count))
+        self.active_pos = list(range(player_count))
+        self.round_direction = DIRECTION_CLOCKWISE
+
+        # Randomized order of player indices for role viewing
+        self.role_reveal_order = list(range(player_count))
+        self.rng.shuffle(self.role_reveal_order)
+
+        self.first_round_starter_index = self.choose_first_round_starter()
+
+    def choose_first_round_starter(self):
+        """
+        Picks the Round 1 starter. In the long modes a Spy drawn as starter is
+        re-rolled to a Local 85% of the time for better game balance.
+        """
+        if self.game_mode == MODE_SINGLE_ROUND:
+            # Single Round mode doesn't need turn skewing, set starter arbitrarily
+            return 0
+
+        start_idx = self.rng.randrange(self.player_count)
+        if self.is_spy(start_idx) and self.rng.random() < LOCAL_START_SKEW:
+            local_indices = list(bit_indices(self.active_mask & ~self.spy_mask))
+            if local_indices:
+                return self.rng.choice(local_indices)
+        return start_idx
+
+    # --- State Queries ---
+    @property
+    def player_count(self):
+        return len(self.players)
+
+    def name(self, index):
+        return self.players[index].name
+
+    def is_spy(self, index):
+        return bool(self.spy_mask >> index & 1)
+
+    def is_active(self, index):
+        # Active means a Local or a Spy that has not been caught
+        return bool(self.active_mask >> index & 1)
+
+    def spy_indices(self):
+        return list(bit_indices(self.spy_mask))
+
+    def active_player_indices(self):
+        return list(bit_indices(self.active_mask))
+
+    def active_spy_count(self):
+        return self.active_spies
+
+    def active_local_count(self):
+        return self.active_locals
+
+    def check_counters(self):
+        """Debug consistency check: compares the incremental counters with a full scan."""
+        active_spies = popcount(self.active_mask & self.spy_mask)
+        active_locals = popcount(self.active_mask & ~self.spy_mask)
+        if (active_spies, active_locals) != (self.active_spies, self.active_locals):
+            raise AssertionError(
+                f"Counter drift: tracked {self.active_spies} Spies / {self.active_locals} Locals, "
+                f"scanned {active_spies} Spies / {active_locals} Locals."
+            )
+
+    # --- Turn Order (EASY/HARD) ---
+    def _links(self, direction):
+        return self.prev_seat if direction == DIRECTION_COUNTER_CLOCKWISE else self.next_seat
+
+    def first_active_from(self, index, direction=DIRECTION_CLOCKWISE):
+        """Returns the first active player at or after index in the given direction, or None if nobody is active."""
+        if not self.active_mask:
+            return None
+
+        # An eliminated seat keeps the link it had when it left the ring, so every
+        # seat it skips is inactive. Walk those links and compress the path.
+        links = self._links(direction)
+        index %= self.player_count
+        skipped = []
+        while not self.is_active(index):
+            skipped.append(index)
+            index = links[index]
+        for seat in skipped:
+            links[seat] = index
+        return index
+
+    def next_active_player(self, index, direction=None):
+        """Returns the next active player after index, following the round direction."""
+        direction = direction or self.round_direction
+        if not self.is_active(index):
+            return self.first_active_from(index, direction)
+        return self._links(direction)[index]
+
+    def random_active_player(self):
+        """Randomly selects the next round starter from any active player (no skewing)."""
+        if not self.active_order:
+            return None
+        return self.active_order[self.rng.randrange(len(self.active_order))]
+
+    def choose_round_direction(self):
+        self.round_direction = self.rng.choice(ROUND_DIRECTIONS)
+        return self.round_direction
+
+    # --- Rules (EASY/HARD) ---
+    def eliminate(self, index):
+        """Marks a player inactive and updates the counters and the active-player ring in O(1)."""
+        bit = 1 << index
+        if not self.active_mask & bit:
+            return
+        self.active_mask ^= bit
+        if self.spy_mask & bit:
+            self.active_spies -= 1
+        else:
+            self.active_locals -= 1
+
+        # Unlink from the ring; the seat keeps its own links for first_active_from
+        prev_seat, next_seat = self.prev_seat[index], self.next_seat[index]
+        self.next_seat[prev_seat] = next_seat
+        self.prev_seat[next_seat] = prev_seat
+
+        # Swap-remove from the dense active list
+        pos = self.active_pos[index]
+        last = self.active_order.pop()
+        if last != index:
+            self.active_order[pos] = last
+            self.active_pos[last] = pos
+
+        if self.debug:
+            self.check_counters()
+
+    def _event(self, event, **details):
+        details['event'] = event
+        details['active_spies'] = self.active_spies
+        details['active_locals'] = self.active_locals
+        return details
+
+    def _game_over(self, winner, reason, **details):
+        self.winner = winner
+        return self._event(EVENT_GAME_OVER, winner=winner, reason=reason, **details)
+
+    def check_win_conditions(self):
+        """Returns a GAME_OVER event if either side has won, otherwise None."""
+        if self.game_mode == MODE_SINGLE_ROUND:
+            return None # SR mode uses resolve_single_round_accusation
+
+        if self.active_spies == 0:
+            return self._game_over(WINNER_LOCALS, REASON_ALL_SPIES_CAUGHT)
+        if self.active_spies >= self.active_locals:
+            return self._game_over(WINNER_SPY, REASON_PARITY)
+        return None
+
+    def resolve_accusation(self, accused_index):
+        """Eliminates the accused player and reports what happens next."""
+        if self.game_mode == MODE_SINGLE_ROUND:
+            # Fallback prevention
+            return self.resolve_single_round_accusation()
+
+        # Is this an *active* Spy?
+        is_accused_spy = self.is_active(accused_index) and self.is_spy(accused_index)
+
+        # Mark the player as inactive (caught Spy or wrongly accused Local)
+        self.eliminate(accused_index)
+
+        if is_accused_spy and self.game_mode == MODE_EASY:
+            # Any caught Spy in Easy Mode gets a final guess chance
+            return self._event(EVENT_SPY_CAUGHT, player_index=accused_index)
+
+        outcome = self.check_win_conditions()
+        if outcome:
+            return outcome
+
+        if is_accused_spy:
+            return self._event(EVENT_SPY_ELIMINATED, player_index=accused_index)
+        return self._event(EVENT_LOCAL_ELIMINATED, player_index=accused_index)
+
+    def resolve_spy_guess(self, accused_index, guessed_word):
+        """Resolves the final guess of a Spy caught in Easy Mode."""
+        if guessed_word == self.secret_word:
+            # SPY WINS! (Regardless of whether they were the last spy)
+            return self._game_over(WINNER_SPY, REASON_SPY_GUESSED_WORD, player_index=accused_index)
+
+        # The Spy is already marked inactive, so check the win condition immediately
+        outcome = self.check_win_conditions()
+        if outcome:
+            return outcome
+        return self._event(EVENT_SPY_GUESS_FAILED, player_index=accused_index)
+
+    # --- Rules (SINGLE_ROUND) ---
+    def begin_single_round_accusations(self):
+        self.accused_mask = 0
+        self.accused_count = 0
+
+    def accused_indices(self):
+        return list(bit_indices(self.accused_mask))
+
+    def is_accused(self, index):
+        return bool(self.accused_mask >> index & 1)
+
+    def record_single_round_accusation(self, accused_index):
+        """Records an accusation and resolves the round once enough have been made."""
+        bit = 1 << accused_index
+        if not self.accused_mask & bit:
+            self.accused_mask |= bit
+            self.accused_count += 1
+
+        if self.accused_count < self.spy_count:
+            return self._event(
+                EVENT_ACCUSATION_RECORDED,
+                accused_count=self.accused_count,
+                required_count=self.spy_count
+            )
+        return self.resolve_single_round_accusation()
+
+    def resolve_single_round_accusation(self):
+        """The accusations must exactly match the spy indices for the Locals to win."""
+        spy_list = self.spy_indices()
+
+        if self.accused_mask == self.spy_mask:
+            return self._game_over(WINNER_LOCALS, REASON_PERFECT_ACCUSATION, spy_indices=spy_list)
+
+        # Spies win: Either a local was wrongly accused, or a spy was missed.
+        return self._game_over(
+            WINNER_SPY, REASON_MISSION_FAILED,
+            spy_indices=spy_list,
+            missed_spies=popcount(self.spy_mask & ~self.accused_mask),
+            wrongly_accused=popcount(self.accused_mask & ~self.spy_mask)
+        )
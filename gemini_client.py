@@ -0,0 +1,473 @@
+"""
+HTTP client for the Gemini generateContent API.
+
+The app owns one GeminiClient for its whole lifetime. It wraps a single
+requests.Session with a keep-alive connection pool, so generations and their
+retries reuse an open TCP+TLS connection instead of paying a new handshake on
+every call. Every attempt first takes a token from a client-wide TokenBucket.
+A CircuitBreaker is consulted once per request and told its final outcome, so
+one request exhausting its retries counts as a single failure. Retries use
+full-jitter backoff and honour a Retry-After header, so devices sharing a key
+do not retry in lockstep. stream_events() reads the server-sent-event variant
+of the API and WordStreamParser pulls finished words out of the partial JSON
+it yields. GenerationPool runs generation jobs on a fixed number of worker
+threads and folds duplicate requests for the same category into one call.
+Kivy-free: it runs on worker threads and never touches the UI.
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from telemetry import NULL_TRACE
+
+DEFAULT_POOL_SIZE = 4   # Pooled keep-alive connections to the API host
+DEFAULT_TIMEOUT = 15    # Seconds per HTTP attempt
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RATE = 1.0      # Requests per second the token bucket refills
+DEFAULT_BURST = 3       # Requests that may go out back to back
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_CAP = 16.0
+MAX_RETRY_AFTER = 60.0  # Longest server-requested wait honoured before giving up on a retry
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+DEFAULT_WORKERS = 2     # Concurrent generation jobs; the rest wait in the queue
+
+
+class GeminiError(Exception):
+    """Raised when a Gemini request fails after all retries."""
+
+
+class GeminiCancelled(GeminiError):
+    """Raised when a generation job is cancelled before its request completes."""
+
+
+class GeminiUnavailable(GeminiError):
+    """Raised without a request while the circuit breaker is open."""
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
+
+
+class TokenBucket:
+    """Client-side rate limiter: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.waits = 0
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self, cancel_event):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            self.waits += 1
+            if cancel_event.wait(wait):
+                raise GeminiCancelled("Request cancelled.")
+
+    def state(self):
+        with self.lock:
+            self._refill()
+            return {'tokens': round(self.tokens, 2), 'rate': self.rate, 'capacity': self.capacity, 'waits': self.waits}
+
+
+class CircuitBreaker:
+    """
+    Closed: requests flow and consecutive failed requests are counted (a
+    request fails once, after all its retries). After
+    failure_threshold of them it opens and every request fails fast. After
+    reset_timeout it goes half-open and lets one trial request through; its
+    success closes the circuit and its failure opens it again.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.status = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.trips = 0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """False to fail fast, otherwise the status the request runs under (HALF_OPEN for the trial)."""
+        with self.lock:
+            if self.status == self.OPEN:
+                if self.clock() - self.opened_at < self.reset_timeout:
+                    return False
+                self.status = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.status == self.HALF_OPEN:
+                if self.trial_in_flight:
+                    return False
+                self.trial_in_flight = True
+            return self.status
+
+    def release_trial(self):
+        """Lets another trial through after the trial request ended without a verdict (cancelled)."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self.lock:
+            self.status = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.status == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.status != self.OPEN:
+                    self.trips += 1
+                self.status = self.OPEN
+                self.opened_at = self.clock()
+
+    def retry_in(self):
+        """Seconds until an open circuit lets a trial request through."""
+        with self.lock:
+            if self.status != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+
+    def state(self):
+        retry_in = self.retry_in()
+        with self.lock:
+            return {'status': self.status, 'failures': self.failures, 'trips': self.trips, 'retry_in': round(retry_in, 1)}
+
+
+class GeminiClient:
+    """
+    Long-lived, thread-safe Gemini HTTP client.
+
+    Requests only share the connection pool (no cookies or per-call session
+    state), and pool_block=True makes extra threads wait for a pooled
+    connection instead of opening throwaway ones. The rate limiter and the
+    circuit breaker are shared by every thread using the client.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 rate_limiter=None, breaker=None, backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP, rng=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.breaker = breaker or CircuitBreaker()
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rng = rng or random.Random()
+        self.requests_sent = 0
+        self.retries = 0
+        self.throttled = 0 # 429 responses
+
+        self.session = requests.Session()
+        self.session.headers['Content-Type'] = 'application/json'
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def backoff(self, attempt):
+        """Full-jitter backoff: a uniform wait in [0, min(cap, base * 2**attempt)]."""
+        return self.rng.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def connection_count(self, url):
+        """Connections opened so far by the adapter serving url (used to spot a fresh connect)."""
+        try:
+            pools = self.session.get_adapter(url).poolmanager.pools
+            return sum(pools[key].num_connections for key in pools.keys())
+        except (AttributeError, KeyError):
+            return 0
+
+    def send(self, url, payload, cancel_event=None, stream=False, trace=NULL_TRACE):
+        """
+        POSTs a JSON payload through the rate limiter and circuit breaker and returns
+        the successful response. Connection errors, 429 and 5xx responses are retried
+        with full-jitter backoff (or the server's Retry-After); other errors are final.
+        The breaker sees one success or failure per call, not one per attempt.
+        Timings and failure classes are recorded on trace.
+        """
+        cancel_event = cancel_event or threading.Event()
+        circuit = self.breaker.allow()
+        if not circuit:
+            trace.count('failure.circuit_open')
+            raise GeminiUnavailable(f"Gemini is unavailable; retrying in {self.breaker.retry_in():.0f}s.")
+        try:
+            return self._attempts(url, payload, cancel_event, stream, trace)
+        except GeminiCancelled:
+            if circuit == CircuitBreaker.HALF_OPEN:
+                self.breaker.release_trial()
+            raise
+
+    def _attempts(self, url, payload, cancel_event, stream, trace):
+        error = None
+        for attempt in range(self.max_retries):
+            if cancel_event.is_set():
+                raise GeminiCancelled("Request cancelled.")
+            if attempt and self.breaker.retry_in():
+                # Other requests opened the circuit while this one was backing off
+                trace.count('failure.circuit_open')
+                raise GeminiUnavailable(f"Gemini is unavailable; retrying in {self.breaker.retry_in():.0f}s.") from error
+            with trace.timed('rate_limit'):
+                self.rate_limiter.acquire(cancel_event)
+
+            self.requests_sent += 1
+            delay = self.backoff(attempt)
+            connections = self.connection_count(url)
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url, data=json.dumps(payload), timeout=self.timeout, stream=stream)
+            except requests.exceptions.RequestException as e:
+                trace.add('request', time.perf_counter() - started)
+                trace.count('failure.timeout' if isinstance(e, requests.exceptions.Timeout) else 'failure.connection')
+                error = e
+            else:
+                # elapsed runs from sending to the parsed headers; with stream=False the rest is the body
+                headers_at = response.elapsed.total_seconds()
+                trace.add('request', headers_at)
+                if not stream:
+                    trace.add('transfer', max(0.0, time.perf_counter() - started - headers_at))
+                if self.connection_count(url) > connections:
+                    trace.count('new_connections')
+
+                if response.status_code < 400:
+                    self.breaker.record_success()
+                    return response
+                error = requests.exceptions.HTTPError(f"HTTP {response.status_code}", response=response)
+                response.close()
+                if response.status_code not in RETRYABLE_STATUS:
+                    # The API is up but rejected this request; retrying will not help
+                    trace.count('failure.http_4xx')
+                    self.breaker.record_success()
+                    raise GeminiError(f"API rejected the request (HTTP {response.status_code}).") from error
+
+                if response.status_code == 429:
+                    self.throttled += 1
+                    trace.count('failure.http_429')
+                else:
+                    trace.count('failure.http_5xx')
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None:
+                    if retry_after > MAX_RETRY_AFTER:
+                        break
+                    delay = retry_after
+
+            if attempt < self.max_retries - 1:
+                self.retries += 1
+                trace.count('retries')
+                with trace.timed('backoff'):
+                    if cancel_event.wait(delay):
+                        raise GeminiCancelled("Request cancelled.")
+        self.breaker.record_failure()
+        raise GeminiError("Network or API failure.") from error
+
+    def post_json(self, url, payload, cancel_event=None, trace=NULL_TRACE):
+        """POSTs a JSON payload (see send) and returns the decoded response."""
+        response = self.send(url, payload, cancel_event, trace=trace)
+        try:
+            return response.json()
+        except ValueError as e:
+            trace.count('failure.malformed')
+            raise GeminiError("API returned a malformed response.") from e
+
+    def stream_events(self, url, payload, cancel_event=None, trace=NULL_TRACE):
+        """
+        POSTs to a streaming (alt=sse) endpoint and yields each decoded `data:` event.
+        Connecting is retried like post_json; once events have started a failure is final.
+        """
+        cancel_event = cancel_event or threading.Event()
+        response = self.send(url, payload, cancel_event, stream=True, trace=trace)
+        # Event streams are always UTF-8; without a charset requests would fall back to ISO-8859-1
+        response.encoding = 'utf-8'
+        with response, trace.timed('transfer'):
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if cancel_event.is_set():
+                        raise GeminiCancelled("Request cancelled.")
+                    if not line or not line.startswith('data:'):
+                        continue
+                    try:
+                        yield json.loads(line[len('data:'):])
+                    except ValueError:
+                        continue # Skip a garbled event; the parser copes with the gap
+            except requests.exceptions.RequestException as e:
+                trace.count('failure.stream_interrupted')
+                raise GeminiError("Stream interrupted.") from e
+
+    def state(self):
+        """Snapshot of the limiter, breaker and request counters, for monitoring."""
+        return {
+            'requests': self.requests_sent,
+            'retries': self.retries,
+            'throttled': self.throttled,
+            'rate_limiter': self.rate_limiter.state(),
+            'circuit': self.breaker.state(),
+        }
+
+    def close(self):
+        self.session.close()
+
+
+def event_text(event):
+    """The text fragment carried by one streamed generateContent event ('' if it has none)."""
+    try:
+        return ''.join(part.get('text', '') for part in event['candidates'][0]['content']['parts'])
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return ''
+
+
+class WordStreamParser:
+    """
+    Incremental scanner for a JSON document like {"words": ["a", "b", ...]} that
+    arrives in arbitrary fragments. feed() returns the array strings completed
+    by that fragment, so words can be shown before the document is closed.
+    Object keys and other non-array strings are ignored, and nothing is ever
+    re-parsed from the start.
+    """
+
+    def __init__(self):
+        self.text = []          # Every fragment fed so far, for the final full parse
+        self.array_depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.current = []
+
+    def feed(self, fragment):
+        self.text.append(fragment)
+        words = []
+        for ch in fragment:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                    self.current.append(ch)
+                elif ch == '\\':
+                    self.escaped = True
+                    self.current.append(ch)
+                elif ch == '"':
+                    self.in_string = False
+                    if self.array_depth:
+                        word = self._decode(''.join(self.current)).strip()
+                        if word:
+                            words.append(word)
+                else:
+                    self.current.append(ch)
+            elif ch == '"':
+                self.in_string = True
+                self.current = []
+            elif ch == '[':
+                self.array_depth += 1
+            elif ch == ']' and self.array_depth:
+                self.array_depth -= 1
+        return words
+
+    def full_text(self):
+        return ''.join(self.text)
+
+    @staticmethod
+    def _decode(raw):
+        try:
+            return json.loads('"' + raw + '"')
+        except ValueError:
+            return raw
+
+
+class GenerationPool:
+    """
+    Fixed-size worker pool for generation jobs, keyed by category.
+
+    submit() runs fn(cancel_event, *args) on the pool unless a job with the same
+    key is already queued or running, in which case the caller gets that job's
+    future instead of a new request. cancel() drops a queued job and asks a
+    running one to stop at its next retry or delay.
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gemini')
+        self.lock = threading.Lock()
+        self.jobs = {} # key -> (future, cancel_event)
+
+    def submit(self, key, fn, *args):
+        """Returns (future, created); created is False when an in-flight job was reused."""
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None:
+                return job[0], False
+
+            cancel_event = threading.Event()
+            future = self.executor.submit(fn, cancel_event, *args)
+            self.jobs[key] = (future, cancel_event)
+
+        future.add_done_callback(lambda f: self._finished(key, f))
+        return future, True
+
+    def _finished(self, key, future):
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is not None and job[0] is future:
+                del self.jobs[key]
+
+    def is_in_flight(self, key):
+        with self.lock:
+            return key in self.jobs
+
+    def in_flight(self):
+        with self.lock:
+            return list(self.jobs)
+
+    def cancel(self, key):
+        """Cancels a queued or running job. Returns False if there was none."""
+        with self.lock:
+            job = self.jobs.pop(key, None)
+        if job is None:
+            return False
+        future, cancel_event = job
+        cancel_event.set()
+        future.cancel()
+        return True
+
+    def shutdown(self):
+        for key in self.in_flight():
+            self.cancel(key)
+        self.executor.shutdown(wait=False)
@@ -1,8 +1,7 @@
 import os
 import random
 import json
-import requests
-import threading
+import bisect
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.floatlayout import FloatLayout
@@ -17,10 +16,24 @@ from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.config import Config
 from kivy.metrics import dp
-from kivy.storage.jsonstore import JsonStore
 from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.graphics import Color, Rectangle
-import math # Import math for ceiling division logic
+from word_pool import WordPool
+from topic_store import TopicStore, TopicCatalogue
+from gemini_client import GeminiClient, GeminiError, GeminiCancelled, GenerationPool, WordStreamParser, event_text
+from response_cache import ResponseCache, cache_key
+from telemetry import Telemetry, NULL_TRACE
+from player_library import LibraryStore, NameIndex, matches, sort_key
+from popup_pool import PopupPool
+from game_engine import (
+    GameEngine, max_spies_for,
+    EVENT_SPY_CAUGHT, EVENT_SPY_ELIMINATED, EVENT_LOCAL_ELIMINATED, EVENT_SPY_GUESS_FAILED,
+    EVENT_ACCUSATION_RECORDED, EVENT_GAME_OVER,
+    REASON_ALL_SPIES_CAUGHT, REASON_PARITY, REASON_SPY_GUESSED_WORD, REASON_PERFECT_ACCUSATION,
+)
 
 # Ensure responsive design for mobile (Kivy-specific setup)
 from kivy.utils import platform
@@ -54,11 +67,26 @@ ACCUSED_COLOR_HEX = '#ffff99'
 # Leave the key as an empty string; the execution environment will provide credentials.
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
 GEMINI_MODEL = "gemini-2.5-flash"
-GEMINI_API_URL = f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+GEMINI_MAX_WORKERS = 2 # Generations running at once; extra requests queue behind them
+GEMINI_BATCH_SIZE = 5 # Categories answered by one batch request
+GEMINI_STREAMING = True # Show single-category words in the review as they arrive
+GEMINI_PAGE_SIZE = 50 # Words asked for per call when refilling a category
+GEMINI_EXCLUSION_LIMIT = 400 # Most recent existing words sent as the "do not repeat" list
+REFILL_SIZES = (50, 200, 500) # Refill targets offered in the regenerate popup
+MIN_WORDS_THRESHOLD = 5 # A category with fewer unused words than this counts as running low
+# Override to point the app at another endpoint, e.g. the local stand-in in fake_gemini.py
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com").rstrip("/")
+GEMINI_API_URL = f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
 
 # --- Game Data ---
-STORE_NAME = 'topic_data.json'
+STORE_NAME = 'topic_data.json' # Legacy JsonStore file, imported once into TOPIC_DB_NAME
+TOPIC_DB_NAME = 'topic_data.db'
+GEMINI_CACHE_DB_NAME = 'gemini_cache.db'
+GEMINI_TELEMETRY_NAME = 'gemini_telemetry.jsonl'
 PLAYER_STORE_NAME = 'player_library.json'
+PLAYER_STORE_JOURNAL = True # Append library edits to a journal, compacting into PLAYER_STORE_NAME now and then
+LIBRARY_PAGE_SIZE = 30 # Library search results fetched at a time; more load as the list is scrolled to the end
+PLAYER_SAVE_DELAY = 0.5 # Seconds of quiet before library edits are written out
 
 # UPDATED to use proper nouns and specific, fixed locations/entities
 GAME_TOPICS = {
@@ -76,6 +104,109 @@ GAME_TOPICS = {
     ],
 }
 
+class LibraryRow(RecycleDataViewBehavior, BoxLayout):
+    """
+    One recycled row of the player library manager. RecycleView only builds
+    enough of these to fill the visible area and rebinds them to new data
+    dicts ({'name', 'remove_callback'}) as the list scrolls.
+    """
+    name = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.spacing = dp(10)
+        self.remove_callback = None
+
+        self.lbl_name = Label(halign='left', valign='middle', size_hint_x=0.7, color=TEXT_PRIMARY)
+        self.lbl_name.bind(size=lambda lbl, size: setattr(lbl, 'text_size', size))
+        btn_remove = Button(text="REMOVE", size_hint_x=0.3, background_color=ACCENT_RED)
+        btn_remove.bind(on_press=lambda x: self.remove_callback(self.name))
+        self.add_widget(self.lbl_name)
+        self.add_widget(btn_remove)
+
+    def on_name(self, instance, name):
+        self.lbl_name.text = name
+
+
+class LibraryPickRow(RecycleDataViewBehavior, Button):
+    """Recycled button of the add-from-library list ({'name', 'pick_callback'})."""
+    name = StringProperty("")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.background_color = (0.3, 0.4, 0.5, 1)
+        self.pick_callback = None
+
+    def on_name(self, instance, name):
+        self.text = name
+
+    def on_press(self):
+        self.pick_callback(self.name)
+
+
+class OutcomePopup(Popup):
+    """
+    Reusable outcome popup template: a header, a body and one action button.
+    Built once by SpyGame.build_popup_template; rebind() fills the slots for
+    each event, and the button calls the current action with the popup.
+    """
+
+    def __init__(self, game, **kwargs):
+        super().__init__(size_hint=(0.9, 0.7), **kwargs)
+        self.action = None
+
+        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
+        content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
+        content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
+
+        self.lbl_header = Label(text="", markup=True, size_hint_y=0.2)
+        self.lbl_body = game.wrap_label(text="", size_hint_y=0.5, color=TEXT_PRIMARY, halign='center', valign='top')
+        self.btn_action = game.wrap_button(text="", size_hint_y=0.2, height=dp(60), background_color=ACCENT_GREEN,
+                                           on_press=lambda x: self.action(self))
+        content.add_widget(self.lbl_header)
+        content.add_widget(self.lbl_body)
+        content.add_widget(self.btn_action)
+        self.content = content
+
+    def rebind(self, title, header, body, button_text, action, header_color=TEXT_PRIMARY, body_font_size='16sp'):
+        self.title = title
+        self.lbl_header.text = header
+        self.lbl_header.color = header_color
+        self.lbl_body.text = body
+        self.lbl_body.font_size = body_font_size
+        self.btn_action.text = button_text
+        self.action = action
+
+
+class RolePopup(Popup):
+    """Reusable secret role popup template: player name, role and round info slots."""
+
+    def __init__(self, game, **kwargs):
+        super().__init__(title='YOUR SECRET ROLE', size_hint=(0.9, 0.7), **kwargs)
+
+        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
+        content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
+        content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
+
+        self.lbl_player = Label(text="", markup=True, size_hint_y=0.15, color=TEXT_PRIMARY)
+        self.lbl_role = Label(text="", markup=True, size_hint_y=0.3, color=TEXT_PRIMARY,
+                              text_size=(dp(280), None), halign='center', valign='top')
+        self.lbl_info = Label(text="", markup=True, size_hint_y=0.5, font_size='18sp', color=TEXT_PRIMARY,
+                              text_size=(dp(280), None), halign='center', valign='top')
+        btn_close = game.wrap_button(text="I HAVE SEEN MY ROLE. CLOSE & HIDE", size_hint_y=0.2, height=dp(60),
+                                     on_press=lambda x: self.dismiss(), background_color=ACCENT_GREEN)
+        content.add_widget(self.lbl_player)
+        content.add_widget(self.lbl_role)
+        content.add_widget(self.lbl_info)
+        content.add_widget(btn_close)
+        self.content = content
+
+    def rebind(self, player_text, role_text, info_text):
+        self.lbl_player.text = player_text
+        self.lbl_role.text = role_text
+        self.lbl_info.text = info_text
+
+
 class SpyGame(BoxLayout):
     """
     Main game container managing state and Gemini API calls.
@@ -99,6 +230,9 @@ class SpyGame(BoxLayout):
     # UI element for Gemini feedback
     gemini_status = StringProperty("")
 
+    # Opt-in: refill low categories in the background while a game is running
+    prefetch_enabled = BooleanProperty(False)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.orientation = 'vertical'
@@ -107,48 +241,46 @@ class SpyGame(BoxLayout):
         self.background_color = DARK_BG
 
         # Topic data storage
-        self.store = JsonStore(STORE_NAME)
+        self.store = TopicStore(TOPIC_DB_NAME, legacy_json_path=STORE_NAME)
 
-        # Load user-modified topics from storage
-        stored_topics = self.store.get('topics').get('topics', {}) if self.store.exists('topics') else {}
 
         # Player data storage
-        self.player_store = JsonStore(PLAYER_STORE_NAME)
-        if self.player_store.exists('library'):
-            # The .get('library') returns the dictionary stored under 'library'.
-            # That dictionary contains the 'players' key.
-            self.player_library = self.player_store.get('library').get('players', {})
-        else:
-            # If the 'library' key does not exist, initialize an empty dictionary.
-            self.player_library = {}
-
-        # Merge stored topics (and any user edits) with the default topics
+        self.player_store = LibraryStore(PLAYER_STORE_NAME, journal=PLAYER_STORE_JOURNAL)
+        self.player_library = self.player_store.load()
+        # Bursts of adds/removes are coalesced into one write (see save_player_library)
+        self.player_save_trigger = Clock.create_trigger(self.flush_player_library, PLAYER_SAVE_DELAY)
+        # Sorted, case-insensitive name index behind the library search boxes
+        self.library_index = NameIndex(self.player_library)
+
+        # Merge stored topics (and any user edits) with the default topics.
+        # Only names and word counts are loaded here; words are paged in on first use.
         global GAME_TOPICS
-        GAME_TOPICS = {**GAME_TOPICS, **stored_topics}
+        GAME_TOPICS = TopicCatalogue(self.store, defaults=GAME_TOPICS)
 
         # Update initial tracking based on the final GAME_TOPICS list
         self.selected_categories = list(GAME_TOPICS.keys())
-        self.total_used_words = {cat: set() for cat in GAME_TOPICS.keys()}
 
-        self.players = []
+        # Headless rules engine: roles, eliminations, round starters and accusations
+        # (SPYGAME_DEBUG=1 enables its counter consistency checks)
+        self.engine = GameEngine(debug=os.environ.get("SPYGAME_DEBUG") == "1")
+        # Outcome and role popups are built once and rebound per event (SPYGAME_DEBUG=1 also traces allocations)
+        # A template is reused only once its close animation has taken it off the window
+        self.popup_pool = PopupPool(self.build_popup_template, ready=lambda popup: popup.parent is None,
+                                    measure_memory=os.environ.get("SPYGAME_DEBUG") == "1")
+        self.current_player_index = 0
         self.name_inputs = [] # List to hold TextInput objects for player names
+        self.name_rows = [] # Setup name editor rows (TextInput + remove button), one per player
+        self.name_row_pool = [] # Detached rows kept for reuse when the player count grows again
 
         # Persistent storage for player names. Increased to 20 for safety.
         self.player_names_list = [f"Player {i+1}" for i in range(20)]
-        self.role_reveal_order = [] # Stores the randomized order of player indices for role viewing
-        self.first_round_starter_index = 0
 
         # Persistent storage for category names
         self.selected_categories = list(GAME_TOPICS.keys())
 
         # Word pool management
-        # Tracks words used in the current round's category
-        self.used_words_in_current_category = set()
-        # Tracks total words used per category across all rounds of this session
-        self.total_used_words = {cat: set() for cat in GAME_TOPICS.keys()}
-
-        # Single Round Mode State
-        self.single_round_accusations = set() # To track the player indices accused in SR mode
+        # Shuffled deck per category; tracks words used across all rounds of this session
+        self.word_pool = WordPool(GAME_TOPICS)
 
         # --- UI Initialization ---
         self.sm = ScreenManager()
@@ -174,6 +306,19 @@ class SpyGame(BoxLayout):
         self.sm.current = 'setup'
         Window.bind(on_resize=self.on_window_resize)
 
+        # Pooled, keep-alive HTTP session reused by every Gemini call and retry
+        self.gemini_client = GeminiClient()
+        # Bounded worker pool; repeated requests for one category share a single call
+        self.generation_pool = GenerationPool(max_workers=GEMINI_MAX_WORKERS)
+        # Identical prompts are answered from disk instead of calling the API again
+        self.response_cache = ResponseCache(GEMINI_CACHE_DB_NAME)
+        # Low-priority lane for background refills, so they never hold up a user's request
+        self.prefetch_pool = GenerationPool(max_workers=1)
+        self.staged_words = {} # category -> prefetched words waiting for review
+        self.stream_reviews = {} # category -> (popup, header, label, words) of a review still streaming
+        # Per-request timings and outcome counters for the AI Stats popup
+        self.telemetry = Telemetry()
+
         if GEMINI_API_KEY:
             self.session_api_key = GEMINI_API_KEY
 
@@ -385,6 +530,25 @@ class SpyGame(BoxLayout):
         )
         layout.add_widget(btn_generate)
 
+        prefetch_row = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(10))
+        chk_prefetch = CheckBox(active=self.prefetch_enabled, size_hint_x=0.2)
+        chk_prefetch.bind(active=lambda checkbox, value: setattr(self, 'prefetch_enabled', value))
+        lbl_prefetch = Label(
+            text="[b]Refill low categories in the background[/b]",
+            markup=True, color=TEXT_SECONDARY, halign='left', valign='middle', size_hint_x=0.8
+        )
+        prefetch_row.add_widget(chk_prefetch)
+        prefetch_row.add_widget(lbl_prefetch)
+        layout.add_widget(prefetch_row)
+
+        btn_ai_stats = self.wrap_button(
+            text="AI Generation Stats",
+            height=dp(50),
+            on_press=lambda x: self.show_generation_stats_popup(),
+            background_color=LIGHT_BG
+        )
+        layout.add_widget(btn_ai_stats)
+
         scroll_screen_container.add_widget(layout)
         self.setup_screen.add_widget(scroll_screen_container)
 
@@ -400,7 +564,8 @@ class SpyGame(BoxLayout):
         content.canvas.before.add(Color(*LIGHT_BG))
         content.canvas.before.add(Rectangle(size=content.size, pos=content.pos))
 
-        content.add_widget(self.wrap_label(text="[b]Player Library[/b] (Total: {})".format(len(self.player_library)), size_hint_y=None, color=TEXT_PRIMARY, font_size='18sp'))
+        self.lbl_library_total = self.wrap_label(text=self.library_total_text(), size_hint_y=None, color=TEXT_PRIMARY, font_size='18sp')
+        content.add_widget(self.lbl_library_total)
 
         # --- Add New Player Section ---
         add_layout = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(10))
@@ -411,22 +576,20 @@ class SpyGame(BoxLayout):
         content.add_widget(add_layout)
         # ----------------------------
 
-        # --- Library List Section ---
-        library_container = BoxLayout(orientation='vertical', spacing=dp(5), size_hint_y=None)
-        library_container.bind(minimum_height=library_container.setter('height'))
+        self.ti_library_search = self.build_library_search(self.filter_library_rows)
+        content.add_widget(self.ti_library_search)
 
-        for name in sorted(self.player_library.keys()):
-            row = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(10))
-            row.add_widget(self.wrap_label(text=name, halign='left', height=dp(40), size_hint_x=0.7, size_hint_y=1.0))
-
-            btn_remove = Button(text="REMOVE", size_hint_x=0.3, background_color=ACCENT_RED,
-                                on_press=lambda x, n=name: self.remove_player_from_library(n))
-            row.add_widget(btn_remove)
-            library_container.add_widget(row)
-
-        scroll_view = ScrollView(size_hint_y=0.7, do_scroll_x=False)
-        scroll_view.add_widget(library_container)
-        content.add_widget(scroll_view)
+        # --- Library List Section ---
+        # Virtualized: only the visible rows exist, and adds/removes edit the data list in place
+        self.library_rv = RecycleView(size_hint_y=0.7, do_scroll_x=False)
+        library_layout = RecycleBoxLayout(orientation='vertical', spacing=dp(5), size_hint_y=None,
+                                          default_size=(None, dp(40)), default_size_hint=(1, None))
+        library_layout.bind(minimum_height=library_layout.setter('height'))
+        self.library_rv.add_widget(library_layout)
+        self.library_rv.viewclass = LibraryRow
+        self.library_rv.bind(scroll_y=lambda rv, scroll_y: scroll_y <= 0 and self.load_more_library_rows())
+        self.filter_library_rows()
+        content.add_widget(self.library_rv)
         # ----------------------------
 
         btn_close = self.wrap_button(text="CLOSE LIBRARY", size_hint_y=None, height=dp(50), on_press=lambda x: self.library_popup.dismiss(), background_color=ACCENT_BLUE)
@@ -435,21 +598,66 @@ class SpyGame(BoxLayout):
         self.library_popup = Popup(title='Player Library', content=content, size_hint=(0.9, 0.9))
         self.library_popup.open()
 
+    def build_library_search(self, on_query):
+        """Type-ahead search box; on_query() runs on every keystroke."""
+        ti_search = TextInput(hint_text="Search players...", multiline=False, size_hint_y=None, height=dp(40))
+        ti_search.bind(text=lambda ti, text: on_query())
+        return ti_search
+
+    def filter_library_rows(self):
+        """Shows the first page of library names matching the search box, via the name index."""
+        shown = self.library_index.search(self.ti_library_search.text, limit=LIBRARY_PAGE_SIZE)
+        # Sort keys of the rows on screen, so adds/removes can bisect to their row
+        self.library_shown = [sort_key(name) for name in shown]
+        self.library_more = len(shown) == LIBRARY_PAGE_SIZE
+        self.library_rv.data = [self.library_row_data(name) for name in shown]
+
+    def load_more_library_rows(self):
+        """Appends the next page of matches once the list is scrolled to the bottom."""
+        if not self.library_more:
+            return
+        after = self.library_shown[-1][1] if self.library_shown else None
+        page = self.library_index.search(self.ti_library_search.text, limit=LIBRARY_PAGE_SIZE, after=after)
+        self.library_more = len(page) == LIBRARY_PAGE_SIZE
+        self.library_shown.extend(sort_key(name) for name in page)
+        self.library_rv.data.extend(self.library_row_data(name) for name in page)
+
+    def library_row_data(self, name):
+        return {'name': name, 'remove_callback': self.remove_player_from_library}
+
+    def library_total_text(self):
+        return "[b]Player Library[/b] (Total: {})".format(len(self.player_library))
+
     def add_player_to_library(self, instance):
         name = self.ti_new_player.text.strip()
         if name and name not in self.player_library:
             self.player_library[name] = {'image': None, 'custom': True}
+            self.player_store.record_add(name, self.player_library[name])
+            self.library_index.add(name)
             self.save_player_library()
             self.ti_new_player.text = "" # Clear input
-            self.library_popup.dismiss()
-            self.show_library_manager_popup() # Reopen to refresh list
+
+            # Insert the row in sorted position instead of rebuilding the popup; names past the
+            # last loaded row will show up with a later page
+            if matches(name, self.ti_library_search.text) and (
+                    not self.library_more or sort_key(name) < self.library_shown[-1]):
+                index = bisect.bisect_left(self.library_shown, sort_key(name))
+                self.library_shown.insert(index, sort_key(name))
+                self.library_rv.data.insert(index, self.library_row_data(name))
+            self.lbl_library_total.text = self.library_total_text()
 
     def remove_player_from_library(self, name):
         if name in self.player_library:
             del self.player_library[name]
+            self.player_store.record_remove(name)
+            self.library_index.remove(name)
             self.save_player_library()
-            self.library_popup.dismiss()
-            self.show_library_manager_popup() # Reopen to refresh list
+
+            index = bisect.bisect_left(self.library_shown, sort_key(name))
+            if index < len(self.library_shown) and self.library_shown[index] == sort_key(name):
+                del self.library_shown[index]
+                del self.library_rv.data[index]
+            self.lbl_library_total.text = self.library_total_text()
 
     def show_player_manager_popup(self, instance):
         # 1. Create content layout
@@ -521,29 +729,40 @@ class SpyGame(BoxLayout):
         # Get names currently in the setup list to filter them out
         active_names = set(self.player_names_list[:self.player_count])
 
-        library_list_container = BoxLayout(orientation='vertical', spacing=dp(5), size_hint_y=None)
-        library_list_container.bind(minimum_height=library_list_container.setter('height'))
-
-        # Filter library names: only show names NOT currently in the setup list
-        available_library_players = sorted([
-            name for name in self.player_library.keys() if name not in active_names
-        ])
-
-        if not available_library_players:
-            library_list_container.add_widget(self.wrap_label(text="No players available in library.", color=TEXT_SECONDARY, size_hint_y=None, height=dp(40)))
+        lbl_empty = self.wrap_label(text="No players available in library.", color=TEXT_SECONDARY, size_hint_y=None, height=dp(40))
+        pick = lambda name: self.add_library_player_to_setup(name, add_popup, setup_manager_popup)
+
+        library_rv = RecycleView(size_hint_y=0.7, do_scroll_x=False)
+        library_layout = RecycleBoxLayout(orientation='vertical', spacing=dp(5), size_hint_y=None,
+                                          default_size=(None, dp(50)), default_size_hint=(1, None))
+        library_layout.bind(minimum_height=library_layout.setter('height'))
+        library_rv.add_widget(library_layout)
+        library_rv.viewclass = LibraryPickRow
+
+        # Whether the index has matches past the last loaded row
+        more = [False]
+
+        def filter_rows(after=None):
+            # Only show library names NOT currently in the setup list, one page at a time
+            page = self.library_index.search(ti_search.text, exclude=active_names, limit=LIBRARY_PAGE_SIZE, after=after)
+            rows = [{'name': name, 'pick_callback': pick} for name in page]
+            if after is None:
+                library_rv.data = rows
+                lbl_empty.opacity = 0 if page else 1
+            else:
+                library_rv.data.extend(rows)
+            more[0] = len(page) == LIBRARY_PAGE_SIZE
 
-        for name in available_library_players:
-            btn = Button(
-                text=name,
-                size_hint_y=None, height=dp(50), background_color=(0.3, 0.4, 0.5, 1),
-                # CRITICAL: Pass both popups to the final function
-                on_press=lambda x, n=name: self.add_library_player_to_setup(n, add_popup, setup_manager_popup)
-            )
-            library_list_container.add_widget(btn)
+        def load_more(rv, scroll_y):
+            if scroll_y <= 0 and more[0] and rv.data:
+                filter_rows(after=rv.data[-1]['name'])
+        library_rv.bind(scroll_y=load_more)
 
-        scroll_view = ScrollView(size_hint_y=0.7, do_scroll_x=False)
-        scroll_view.add_widget(library_list_container)
-        content.add_widget(scroll_view)
+        ti_search = self.build_library_search(lambda: filter_rows())
+        content.add_widget(ti_search)
+        content.add_widget(lbl_empty)
+        content.add_widget(library_rv)
+        filter_rows()
 
         btn_close = self.wrap_button(text="CANCEL", size_hint_y=None, height=dp(50), on_press=lambda x: add_popup.dismiss(), background_color=ACCENT_RED)
         content.add_widget(btn_close)
@@ -582,38 +801,57 @@ class SpyGame(BoxLayout):
         if not hasattr(self, 'player_names_container_popup'):
             return
 
-        # This replaces the old update_player_name_inputs but targets the new popup container
-        ROW_HEIGHT = dp(40)
-        SPACING = dp(5)
-
-        self.player_names_container_popup.clear_widgets()
-        self.name_inputs = [] # Reinitialize name_inputs list
+        # This replaces the old update_player_name_inputs but targets the new popup container.
+        # Rows are diffed against player_count/player_names_list rather than rebuilt: surplus
+        # rows are detached into self.name_row_pool and reused when the count grows again.
+        container = self.player_names_container_popup
+        if self.name_rows and self.name_rows[0].parent is not container:
+            # The manager popup was reopened with a new container; move the existing rows over
+            for row in self.name_rows:
+                if row.parent is not None:
+                    row.parent.remove_widget(row)
+                container.add_widget(row)
 
         if self.player_count > len(self.player_names_list):
              new_defaults = [f"Player {i+1}" for i in range(len(self.player_names_list), self.player_count)]
              self.player_names_list.extend(new_defaults)
 
-        for i in range(self.player_count):
-            default_name = self.player_names_list[i]
-
-            row = BoxLayout(size_hint_y=None, height=ROW_HEIGHT, spacing=dp(5))
-            ti = TextInput(
-                text=default_name,
-                multiline=False,
-                size_hint_y=1.0,
-                size_hint_x=0.7, # Reduced width to fit remove button
-                height=ROW_HEIGHT,
-                # ... (styling remains the same) ...
-            )
-            self.name_inputs.append(ti)
-            row.add_widget(ti)
+        while len(self.name_rows) > self.player_count:
+            row = self.name_rows.pop()
+            container.remove_widget(row)
+            self.name_row_pool.append(row)
 
-            btn_remove = Button(
-                text="X", size_hint_x=0.3, background_color=ACCENT_RED,
-                on_press=lambda x, idx=i: self.remove_player_from_setup(idx)
-            )
-            row.add_widget(btn_remove)
-            self.player_names_container_popup.add_widget(row)
+        while len(self.name_rows) < self.player_count:
+            row = self.name_row_pool.pop() if self.name_row_pool else self.build_player_name_row()
+            row.index = len(self.name_rows)
+            container.add_widget(row)
+            self.name_rows.append(row)
+
+        # Only touch inputs whose name actually changed
+        for row, name in zip(self.name_rows, self.player_names_list):
+            if row.ti.text != name:
+                row.ti.text = name
+        self.name_inputs = [row.ti for row in self.name_rows]
+
+    def build_player_name_row(self):
+        ROW_HEIGHT = dp(40)
+
+        row = BoxLayout(size_hint_y=None, height=ROW_HEIGHT, spacing=dp(5))
+        row.ti = TextInput(
+            multiline=False,
+            size_hint_y=1.0,
+            size_hint_x=0.7, # Reduced width to fit remove button
+            height=ROW_HEIGHT,
+        )
+        row.add_widget(row.ti)
+
+        # The row's slot is read at press time, so a pooled row needs no rebinding
+        btn_remove = Button(
+            text="X", size_hint_x=0.3, background_color=ACCENT_RED,
+            on_press=lambda x: self.remove_player_from_setup(row.index)
+        )
+        row.add_widget(btn_remove)
+        return row
 
     def save_names_and_dismiss(self, popup):
         # Final Save: Make sure player_names_list is updated from TextInputs
@@ -737,13 +975,12 @@ class SpyGame(BoxLayout):
 
     def show_current_turn_role_popup(self, instance):
         """Displays the role and word specific to the current player whose turn it is."""
-        player_idx = self.current_player_index % self.player_count
-        player_data = self.players[player_idx]
+        player_idx = self.current_player_index % self.engine.player_count
 
         # --- Use the logic from show_role_popup to generate secure text ---
 
         # 1. Determine role text
-        if player_data['is_spy']:
+        if self.engine.is_spy(player_idx):
             role_text = "[b][color=ff5555]YOU ARE THE SPY[/color][/b]"
             main_info = f"Category: [b]{self.current_category}[/b]\n\nSecret Word: [color=ff5555]???[/color]\n\nGoal: Bluff and guess the word."
         else:
@@ -755,7 +992,7 @@ class SpyGame(BoxLayout):
         content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
         content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
 
-        content.add_widget(Label(text=f"[b]Turn For:[/b] {player_data['name']}", markup=True, size_hint_y=0.15, color=TEXT_PRIMARY))
+        content.add_widget(Label(text=f"[b]Turn For:[/b] {self.engine.name(player_idx)}", markup=True, size_hint_y=0.15, color=TEXT_PRIMARY))
         content.add_widget(
             Label(
                 text=role_text,
@@ -853,7 +1090,7 @@ class SpyGame(BoxLayout):
             self.lbl_count.text = str(self.player_count)
 
             # 3. Adjust spy count if player count drops below min requirement
-            max_spies = math.floor(self.player_count / 3)
+            max_spies = max_spies_for(self.player_count)
             if self.spy_count > max_spies:
                 self.spy_count = max_spies
                 self.lbl_spy_count.text = str(self.spy_count)
@@ -867,7 +1104,7 @@ class SpyGame(BoxLayout):
             self.update_player_name_inputs_for_popup()
 
     def change_spy_count(self, change):
-        max_spies = math.floor(self.player_count / 3)
+        max_spies = max_spies_for(self.player_count)
         new_count = self.spy_count + change
 
         if 1 <= new_count <= max_spies:
@@ -875,8 +1112,13 @@ class SpyGame(BoxLayout):
             self.lbl_spy_count.text = str(self.spy_count)
 
     def save_player_library(self):
-        """Saves the current state of the player library to JsonStore."""
-        self.player_store.put('library', players=self.player_library)
+        """Schedules a library write PLAYER_SAVE_DELAY after the latest edit; each edit pushes it back."""
+        self.player_save_trigger.cancel()
+        self.player_save_trigger()
+
+    def flush_player_library(self, dt=None):
+        """Writes out the library edits recorded since the last flush (see save_player_library)."""
+        self.player_store.flush(self.player_library)
 
     def start_game(self, instance):
         # 1. Final Save: Make sure player_names_list is updated from TextInputs
@@ -888,70 +1130,25 @@ class SpyGame(BoxLayout):
              # Fallback for any empty names
              player_names = [f"Player {i+1}" for i in range(self.player_count)]
 
-        # Initialize all players as active
-        self.players = [{'name': name, 'is_spy': False, 'is_spy_active': True} for name in player_names]
-
-        # 3. Assign roles (Multiple spies)
-        spy_indices = random.sample(range(self.player_count), self.spy_count)
-        for i in spy_indices:
-            self.players[i]['is_spy'] = True
-
-        # 4. Create and shuffle the list of player indices for role viewing
-        self.role_reveal_order = list(range(self.player_count))
-        random.shuffle(self.role_reveal_order)
-
-        # 5. Choose topic
+        # 3. Choose topic
         categories = getattr(self, 'selected_categories', list(GAME_TOPICS.keys()))
         category_name = random.choice(categories)
         # --- Word Selection Logic ---
-
-        # Get all words not used in this category yet
-        available_words = list(set(GAME_TOPICS[category_name]) - self.total_used_words.get(category_name, set()))
-
-        if not available_words:
-            # If all words have been used, reset the pool for this category
-            self.total_used_words[category_name] = set()
-            available_words = GAME_TOPICS[category_name]
-
+        # The deck returns a word not used yet this session and resets itself once exhausted
         self.current_category = category_name
-        self.secret_word = random.choice(available_words)
-
-        # Track the word as used for the session
-        self.total_used_words.setdefault(category_name, set()).add(self.secret_word)
-
+        self.secret_word = self.word_pool.draw(category_name)
         # --- END WORD SELECTION LOGIC ---
 
-        # 6. Create and shuffle the list of player indices for role viewing
-        self.role_reveal_order = list(range(self.player_count))
-        random.shuffle(self.role_reveal_order)
-
-        self.current_player_index = 0 # Start with the first player in the randomized order
-
-        # --- Perform FIRST ROUND START SKEWING LOGIC HERE (Only for long modes) ---
-        if self.game_mode != "SINGLE_ROUND":
-            # Skews the first turn starter away from a Spy (85% chance) for better game balance.
-            active_player_indices = list(range(self.player_count))
-            start_idx = random.choice(active_player_indices)
-            is_start_spy = self.players[start_idx]['is_spy']
-
-            # Skewing logic: 85% chance to re-roll if the starting player is a Spy
-            if is_start_spy and random.random() < 0.85:
-                local_indices = [i for i in active_player_indices if not self.players[i]['is_spy']]
-                if local_indices:
-                    self.first_round_starter_index = random.choice(local_indices)
-                else:
-                    self.first_round_starter_index = start_idx # Keep Spy if no Locals left
-            else:
-                self.first_round_starter_index = start_idx
-        else:
-            # Single Round mode doesn't need turn skewing, set starter arbitrarily
-            self.first_round_starter_index = 0
-        # --- END FIRST ROUND START SKEWING LOGIC ---
+        # 4. Assign roles, the role viewing order and the Round 1 starter (with skewing)
+        self.engine.new_game(player_names, self.spy_count, self.game_mode, category_name, self.secret_word)
 
         self.current_player_index = 0 # Start with the first player in the randomized order
         self.update_role_assignment_screen()
         self.sm.current = 'assign_role'
 
+        # Refill low categories while this game is played, so the next one never waits on the network
+        self.prefetch_low_categories()
+
     def show_category_selector(self):
         content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
         content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
@@ -988,6 +1185,7 @@ class SpyGame(BoxLayout):
 
     def toggle_category(self, cat, value):
         if value:
+            GAME_TOPICS[cat] # Page in the category's words while the selector is open
             if cat not in self.selected_categories:
                 self.selected_categories.append(cat)
         else:
@@ -1001,9 +1199,9 @@ class SpyGame(BoxLayout):
 
     def update_role_assignment_screen(self):
         # Use the index from the shuffled list
-        if self.current_player_index < len(self.role_reveal_order):
-            player_idx = self.role_reveal_order[self.current_player_index]
-            self.current_player_name = self.players[player_idx]['name']
+        if self.current_player_index < len(self.engine.role_reveal_order):
+            player_idx = self.engine.role_reveal_order[self.current_player_index]
+            self.current_player_name = self.engine.name(player_idx)
 
             self.lbl_pass_device.text = (
                 f"[b]Pass Device to:[/b]\n"
@@ -1016,14 +1214,14 @@ class SpyGame(BoxLayout):
 
             # --- SINGLE ROUND MODE ACTIVATION ---
             if self.game_mode == "SINGLE_ROUND":
-                self.single_round_accusations = set() # Reset accusation tracker
+                self.engine.begin_single_round_accusations() # Reset accusation tracker
                 self.show_single_round_accusation_popup()
                 return
             # --- END SINGLE ROUND MODE ACTIVATION ---
 
             # Standard Modes (EASY/HARD): Start the discussion phase.
             self.current_player_index = 0 # Reset to the start of the natural order for turns
-            self.current_player_name = self.players[self.first_round_starter_index]['name']
+            self.current_player_name = self.engine.name(self.engine.first_round_starter_index)
 
             # Neutral screen for game start
             self.lbl_pass_device.text = (
@@ -1035,25 +1233,18 @@ class SpyGame(BoxLayout):
 
     def show_role_popup(self, instance):
         # Use the index from the shuffled list if still in the assignment phase
-        if self.current_player_index < len(self.role_reveal_order):
-            player_idx = self.role_reveal_order[self.current_player_index]
+        if self.current_player_index < len(self.engine.role_reveal_order):
+            player_idx = self.engine.role_reveal_order[self.current_player_index]
         else:
             # If accidentally clicked during the turn phase, use the current turn index
-            player_idx = self.current_player_index % self.player_count
-
-        player_data = self.players[player_idx]
-        self.is_current_player_spy = player_data['is_spy']
-
-        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
-        content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
-        content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
+            player_idx = self.current_player_index % self.engine.player_count
 
+        self.is_current_player_spy = self.engine.is_spy(player_idx)
 
-        if player_data['is_spy']:
+        if self.is_current_player_spy:
             role_text = "[b][color=ff5555]YOU ARE THE SPY[/color][/b]\n\n"
 
-            other_spies = [p['name'] for i, p in enumerate(self.players)
-                           if p['is_spy'] and i != player_idx]
+            other_spies = [self.engine.name(i) for i in self.engine.spy_indices() if i != player_idx]
 
             if other_spies:
                 spy_names = ", ".join(other_spies)
@@ -1079,55 +1270,28 @@ class SpyGame(BoxLayout):
 
 
         # Display the current player's name clearly at the top of the secret role pop-up
-        player_label = Label(text=f"[b]Name:[/b] [color={TEXT_COLOR_TAG}][size=22sp]{player_data['name']}[/size][/color]",
-                             markup=True, size_hint_y=0.15, color=TEXT_PRIMARY)
-        content.add_widget(player_label)
-
-        content.add_widget(Label(
-            text=role_text,
-            markup=True,
-            size_hint_y=0.3,
-            color=TEXT_PRIMARY,
-            text_size=(dp(280), None),
-            halign='center',
-            valign='top'
-        ))
-
-        content.add_widget(Label(
-            text=main_info,
-            markup=True,
-            size_hint_y=0.5,
-            font_size='18sp',
-            color=TEXT_PRIMARY,
-            text_size=(dp(280), None),
-            halign='center',
-            valign='top'
-        ))
-
-        btn_close = self.wrap_button(text="I HAVE SEEN MY ROLE. CLOSE & HIDE", size_hint_y=0.2, height=dp(60), on_press=lambda x: popup.dismiss(), background_color=ACCENT_GREEN)
-        content.add_widget(btn_close)
+        player_text = f"[b]Name:[/b] [color={TEXT_COLOR_TAG}][size=22sp]{self.engine.name(player_idx)}[/size][/color]"
 
         # Popup does not support background_color property. It is styled via the window.
-        popup = Popup(title='YOUR SECRET ROLE', content=content, size_hint=(0.9, 0.7))
-        popup.open()
+        self.popup_pool.show('role', lambda popup: popup.rebind(player_text, role_text, main_info))
 
     def next_player_assignment(self, instance):
         self.current_player_index += 1
 
-        if self.current_player_index < len(self.role_reveal_order):
+        if self.current_player_index < len(self.engine.role_reveal_order):
             self.update_role_assignment_screen()
         else:
             # All roles have been seen (end of randomized list)
 
             # --- SINGLE ROUND MODE: Move to Accusation ---
             if self.game_mode == "SINGLE_ROUND":
-                self.single_round_accusations = set() # Reset accusation tracker
+                self.engine.begin_single_round_accusations() # Reset accusation tracker
                 self.show_single_round_accusation_popup()
                 return
             # --- END SINGLE ROUND MODE ---
 
             # Standard Modes (EASY/HARD): Start the discussion phase.
-            self.current_player_index = self.first_round_starter_index # Set the starting player index for Round 1
+            self.current_player_index = self.engine.first_round_starter_index # Set the starting player index for Round 1
             self.update_game_screen() # Sets up the first turn
             self.sm.current = 'game_play'
 
@@ -1138,11 +1302,12 @@ class SpyGame(BoxLayout):
         content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
         content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
 
-        accused_count = len(self.single_round_accusations)
-        required_count = self.spy_count
+        accused_indices = self.engine.accused_indices()
+        accused_count = len(accused_indices)
+        required_count = self.engine.spy_count
 
         # Build the list of accused player names with the new color
-        accused_names = [self.players[i]['name'] for i in self.single_round_accusations]
+        accused_names = [self.engine.name(i) for i in accused_indices]
         accused_list_str = f"[color={ACCUSED_COLOR_HEX}]{', '.join(accused_names)}[/color]"
 
         if accused_count == 0:
@@ -1172,17 +1337,17 @@ class SpyGame(BoxLayout):
 
         # Only show players who have NOT been accused yet
         available_players = [
-            (i, p) for i, p in enumerate(self.players)
-            if i not in self.single_round_accusations
+            i for i in range(self.engine.player_count)
+            if not self.engine.is_accused(i)
         ]
 
         # Set height based on number of available players
         player_list_container.height = len(available_players) * dp(55)
 
-        for original_index, player in available_players:
+        for original_index in available_players:
             # Buttons are always red (accusation button color)
             btn = Button(
-                text=player['name'],
+                text=self.engine.name(original_index),
                 on_press=lambda x, p_index=original_index: self.record_single_round_accusation(p_index, self.single_round_popup),
                 size_hint_y=None, height=dp(50), background_color=ACCENT_RED
             )
@@ -1203,58 +1368,19 @@ class SpyGame(BoxLayout):
 
     def record_single_round_accusation(self, accused_index, popup):
         """Records an accusation and either loops or resolves the game."""
+        popup.dismiss()
+        outcome = self.engine.record_single_round_accusation(accused_index)
 
-        self.single_round_accusations.add(accused_index)
-
-        if len(self.single_round_accusations) < self.spy_count:
+        if outcome['event'] == EVENT_ACCUSATION_RECORDED:
             # Not enough accusations made, refresh the popup to choose the next one
-            popup.dismiss()
             self.show_single_round_accusation_popup()
         else:
-            # All required accusations have been made, resolve the round
-            popup.dismiss()
-            self.resolve_single_round_accusation()
+            # All required accusations have been made, the round is resolved
+            self.show_outcome(outcome)
 
     def resolve_single_round_accusation(self):
         """Checks if the accused set perfectly matches the spy set."""
-
-        spy_indices = {i for i, p in enumerate(self.players) if p['is_spy']}
-
-        # The accusations must exactly match the spy indices
-        correctly_identified_spies = self.single_round_accusations.intersection(spy_indices)
-
-        is_local_win = len(correctly_identified_spies) == self.spy_count and len(self.single_round_accusations) == self.spy_count
-
-        if is_local_win:
-            # Locals win: Guessed all spies and no locals.
-            result_text = (
-                f"PERFECT ACCUSATION!\n\n"
-                f"The town correctly identified all {self.spy_count} Spies: "
-                f"[b]{', '.join(self.players[i]['name'] for i in spy_indices)}[/b].\n\n"
-                f"[b]LOCALS WIN![/b]"
-            )
-            self.show_result_popup("Locals", result_text)
-        else:
-            # Spies win: Either a local was wrongly accused, or a spy was missed.
-            missed_spies = spy_indices - self.single_round_accusations
-            wrongly_accused_locals = self.single_round_accusations - spy_indices
-
-            summary = []
-            if missed_spies:
-                summary.append(f"{len(missed_spies)} Spy(s) missed.")
-            if wrongly_accused_locals:
-                summary.append(f"{len(wrongly_accused_locals)} Local(s) wrongly accused.")
-
-            result_text = (
-                f"MISSION FAILED!\n\n"
-                f"The Town was unable to identify all spies correctly in a single round. ({' & '.join(summary)})\n\n"
-                f"The Spies were: [b]{', '.join(self.players[i]['name'] for i in spy_indices)}[/b].\n"
-                f"The Secret Word was: [b]{self.secret_word}[/b].\n\n"
-                f"[b]SPIES WIN![/b]"
-            )
-
-            # Since it's Single Round, Spies win automatically if the Locals fail
-            self.show_result_popup("Spy", result_text)
+        self.show_outcome(self.engine.resolve_single_round_accusation())
 
     # --- END SINGLE ROUND MODE HANDLER ---
 
@@ -1279,33 +1405,23 @@ class SpyGame(BoxLayout):
             self.show_single_round_accusation_popup()
             return
 
-        # --- Skip inactive players and loop until an active player is found ---
-        max_attempts = self.player_count  # Prevent infinite loop if all players are inactive
-
-        for _ in range(max_attempts):
-            player_data = self.players[self.current_player_index % self.player_count]
-            if player_data.get('is_spy_active', True): # is_spy_active is True for Locals and active Spies
-                break # Found an active player
-
-            # Player is inactive (caught Spy or wrongly accused Local), skip their turn
-            self.current_player_index += 1
-        else:
-            # If the loop finishes without finding an active player, the game should already be over
-            # (e.g., all players are eliminated). Force a check.
+        # --- Skip inactive players (caught Spies or wrongly accused Locals) ---
+        active_index = self.engine.first_active_from(self.current_player_index)
+        if active_index is None:
+            # No active player left, the game should already be over. Force a check.
             self.check_win_conditions()
             return
 
-        self.current_player_index = self.current_player_index % self.player_count
-        player_data = self.players[self.current_player_index]
+        self.current_player_index = active_index
 
         # --- NEW GAME FLOW LOGIC ---
 
         # 1. Determine random direction
-        direction = random.choice(["CLOCKWISE", "COUNTER-CLOCKWISE"])
+        direction = self.engine.choose_round_direction()
 
         # 2. Update UI for new round start
         self.lbl_game_status.text = (
-            f"[b]Round Starts With:[/b] [color={TEXT_COLOR_TAG}]{player_data['name']}[/color]"
+            f"[b]Round Starts With:[/b] [color={TEXT_COLOR_TAG}]{self.engine.name(active_index)}[/color]"
         )
 
         self.lbl_turn_instruction.text = (
@@ -1343,8 +1459,8 @@ class SpyGame(BoxLayout):
             # Prevent next_turn from running if accidentally triggered in SR mode
             return
 
-        # Advance the index BEFORE calling update_game_screen
-        self.current_player_index = (self.current_player_index + 1) % self.player_count
+        # Advance to the next active player (in the round direction) BEFORE calling update_game_screen
+        self.current_player_index = self.engine.next_active_player(self.current_player_index)
 
         self.update_game_screen()
 
@@ -1366,22 +1482,18 @@ class SpyGame(BoxLayout):
         # 1. Inner BoxLayout for dynamic buttons (Height set dynamically)
         player_list_container = BoxLayout(orientation='vertical', spacing=dp(5), size_hint_y=None)
 
-        # 2. Add buttons for active players
-        active_players = [p for p in self.players if p.get('is_spy_active', True)]
+        # 2. Add buttons for active players (only active players can be accused)
+        active_players = self.engine.active_player_indices()
         # Set height based on number of active players for scrolling
         player_list_container.height = len(active_players) * (dp(55)) # 50 height + 5 spacing
 
-        for i, player in enumerate(self.players):
-            if player.get('is_spy_active', True): # Only list active players for accusation
-                # Find original index for resolution
-                original_index = self.players.index(player)
-
-                btn = Button(
-                    text=player['name'],
-                    on_press=lambda x, p_index=original_index: self.resolve_accusation(p_index, popup),
-                    size_hint_y=None, height=dp(50), background_color=ACCENT_RED
-                )
-                player_list_container.add_widget(btn)
+        for original_index in active_players:
+            btn = Button(
+                text=self.engine.name(original_index),
+                on_press=lambda x, p_index=original_index: self.resolve_accusation(p_index, popup),
+                size_hint_y=None, height=dp(50), background_color=ACCENT_RED
+            )
+            player_list_container.add_widget(btn)
 
         # 3. ScrollView to wrap the inner BoxLayout
         scroll_view = ScrollView(size_hint_y=0.6, do_scroll_x=False)
@@ -1398,152 +1510,116 @@ class SpyGame(BoxLayout):
 
     def check_win_conditions(self):
         # This function is ONLY used by EASY/HARD modes
-        if self.game_mode == "SINGLE_ROUND":
-            return False # SR mode uses resolve_single_round_accusation
-
-        # Correctly count active spies and locals currently in the game
-        active_spies = sum(1 for p in self.players if p['is_spy'] and p.get('is_spy_active', True))
-        active_locals = sum(1 for p in self.players if not p['is_spy'] and p.get('is_spy_active', True))
-
-        if active_spies == 0:
-            result_text = "ALL SPIES CAUGHT! The Locals successfully neutralized the threat.\n\nLocals Win!"
-            self.show_result_popup("Locals", result_text)
-            return True
-
-        if active_spies >= active_locals:
-            result_text = f"PARITY REACHED! ({active_spies} Spies vs {active_locals} Locals).\n\nThe Spies have outlasted the Locals' attempts to accuse them.\n\nSpies Win!"
-            self.show_result_popup("Spy", result_text)
+        outcome = self.engine.check_win_conditions()
+        if outcome:
+            self.show_outcome(outcome)
             return True
-
         return False
 
-    def resolve_accusation(self, accused_index, popup):
-        # This function is ONLY used by EASY/HARD modes
-        if self.game_mode == "SINGLE_ROUND":
-            # Fallback prevention
-            popup.dismiss()
-            self.resolve_single_round_accusation()
-            return
-
-        popup.dismiss()
-
-        accused_player = self.players[accused_index]
-        hidden_word_text = "[color=ff5555]???[/color]"
-
-        is_accused_spy = accused_player.get('is_spy_active', True) and accused_player['is_spy'] # Is this an *active* Spy?
+    def show_outcome(self, outcome):
+        """Renders an outcome event returned by the game engine."""
+        event = outcome['event']
 
-        if is_accused_spy:
-            # --- CASE 1: Correct Accusation (Spy is caught) ---
+        if event == EVENT_GAME_OVER:
+            self.show_result_popup(outcome['winner'], self.game_over_text(outcome))
+        elif event == EVENT_SPY_CAUGHT:
+            # Any caught Spy in Easy Mode gets a final guess chance
+            self.show_spy_guess_popup(outcome['player_index'])
+        elif event == EVENT_SPY_ELIMINATED:
+            self.show_spy_eliminated_popup(outcome)
+        elif event == EVENT_LOCAL_ELIMINATED:
+            self.resume_game_after_wrong_accusation(outcome)
+        elif event == EVENT_SPY_GUESS_FAILED:
+            self.show_spy_removed_popup(outcome)
 
-            # Save the current active spy count BEFORE elimination
-            active_spies_before_elim = sum(1 for p in self.players if p['is_spy'] and p.get('is_spy_active', True))
+    def game_over_text(self, outcome):
+        """Builds the result popup text for a GAME_OVER event."""
+        reason = outcome['reason']
+        active_spies = outcome['active_spies']
+        active_locals = outcome['active_locals']
 
-            accused_player['is_spy_active'] = False # Mark as revealed/caught
+        if reason == REASON_ALL_SPIES_CAUGHT:
+            return "ALL SPIES CAUGHT! The Locals successfully neutralized the threat.\n\nLocals Win!"
 
-            # Calculate remaining spies *after* this elimination
-            active_spies_after_elim = active_spies_before_elim - 1
+        if reason == REASON_PARITY:
+            return f"PARITY REACHED! ({active_spies} Spies vs {active_locals} Locals).\n\nThe Spies have outlasted the Locals' attempts to accuse them.\n\nSpies Win!"
 
-            # NEW LOGIC: Check for Easy Mode guess chance (ANY caught Spy in Easy Mode gets a chance)
-            if self.game_mode == "EASY":
-                # Any caught Spy in Easy Mode gets a final guess chance
-                self.show_spy_guess_popup(accused_player)
-                return # Stop all further processing, wait for guess resolution
-
-            # Hard Mode: Check for automatic win/loss conditions
-            if self.check_win_conditions():
-                return
+        if reason == REASON_SPY_GUESSED_WORD:
+            return f"UNBELIEVABLE! The Spy ({self.engine.name(outcome['player_index'])}) correctly guessed the word: [b]{self.secret_word}[/b]!\n\nSpy Wins!"
 
-            # If we reach here, it means other spies remain or it's Hard Mode. Display elimination message.
-            active_spies = active_spies_after_elim # Use the already calculated count
+        spy_names = ', '.join(self.engine.name(i) for i in outcome['spy_indices'])
 
-            content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
-            content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
-            content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
-
-            content.add_widget(
-                Label(
-                    text=f"[b]Spy ({accused_player['name']}) ELIMINATED![/b]",
-                    markup=True,
-                    size_hint_y=0.2,
-                    color=ACCENT_RED)
-                )
-            content.add_widget(
-                Label(
-                    text=(
-                        f"The Spy failed to guess the word ({hidden_word_text}) and is now removed from play.\n\n"
-                        f"Status: {active_spies} Spies remain. The game continues."
-                        ),
-                    markup=True,
-                    size_hint_y=0.5,
-                    color=TEXT_PRIMARY,
-                    text_size=(dp(280), None),
-                    halign='center',
-                    valign='top')
-                    )
-
-            btn_continue = self.wrap_button(
-                text="CONTINUE GAME",
-                size_hint_y=0.2,
-                height=dp(60),
-                on_press=lambda x: (popup.dismiss(), self.start_next_round()),
-                background_color=ACCENT_GREEN
-                )
-            content.add_widget(btn_continue)
-
-            popup = Popup(title=f'SPY ELIMINATED ({self.game_mode} MODE)', content=content, size_hint=(0.9, 0.7))
-            popup.open()
-
-        else:
-            # --- CASE 2: Wrong Accusation (Local is caught, or inactive Spy was targeted) ---
+        if reason == REASON_PERFECT_ACCUSATION:
+            # Locals win: Guessed all spies and no locals.
+            return (
+                f"PERFECT ACCUSATION!\n\n"
+                f"The town correctly identified all {self.engine.spy_count} Spies: "
+                f"[b]{spy_names}[/b].\n\n"
+                f"[b]LOCALS WIN![/b]"
+            )
 
-            # Mark the player as inactive (effectively eliminated)
-            accused_player['is_spy_active'] = False
+        # Single Round: Spies win automatically if the Locals fail
+        summary = []
+        if outcome['missed_spies']:
+            summary.append(f"{outcome['missed_spies']} Spy(s) missed.")
+        if outcome['wrongly_accused']:
+            summary.append(f"{outcome['wrongly_accused']} Local(s) wrongly accused.")
+
+        return (
+            f"MISSION FAILED!\n\n"
+            f"The Town was unable to identify all spies correctly in a single round. ({' & '.join(summary)})\n\n"
+            f"The Spies were: [b]{spy_names}[/b].\n"
+            f"The Secret Word was: [b]{self.secret_word}[/b].\n\n"
+            f"[b]SPIES WIN![/b]"
+        )
 
-            # Check if this mistake leads to a Spy victory (parity)
-            if self.check_win_conditions():
-                return
-            else:
-                # Game continues.
+    def resolve_accusation(self, accused_index, popup):
+        popup.dismiss()
+        # The engine handles the Single Round fallback, eliminations and win checks
+        self.show_outcome(self.engine.resolve_accusation(accused_index))
 
-                # We need to recalculate remaining locals for the message
-                active_spies = sum(1 for p in self.players if p['is_spy'] and p.get('is_spy_active', True))
-                remaining_locals = sum(1 for p in self.players if not p['is_spy'] and p.get('is_spy_active', True))
+    def show_spy_eliminated_popup(self, outcome):
+        # Hard Mode: other spies remain, display elimination message.
+        accused_name = self.engine.name(outcome['player_index'])
+        active_spies = outcome['active_spies']
+        hidden_word_text = "[color=ff5555]???[/color]"
 
-                self.resume_game_after_wrong_accusation(accused_player, remaining_locals)
+        self.popup_pool.show('outcome', lambda popup: popup.rebind(
+            title=f'SPY ELIMINATED ({self.game_mode} MODE)',
+            header=f"[b]Spy ({accused_name}) ELIMINATED![/b]",
+            header_color=ACCENT_RED,
+            body=(
+                f"The Spy failed to guess the word ({hidden_word_text}) and is now removed from play.\n\n"
+                f"Status: {active_spies} Spies remain. The game continues."
+            ),
+            button_text="CONTINUE GAME",
+            action=lambda popup: (popup.dismiss(), self.start_next_round())
+        ))
 
-    def resume_game_after_wrong_accusation(self, wrongly_accused_player, remaining_locals):
+    def resume_game_after_wrong_accusation(self, outcome):
         # This function is ONLY used by EASY/HARD modes
-
-        # The calculation below was WRONG. It needs to count ACTIVE SPIES, not all active players.
-        active_spies = sum(1 for p in self.players if p['is_spy'] and p.get('is_spy_active', True))
-
-        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
-        content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
-        content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
-
-        content.add_widget(Label(text=f"[b]Accusation Failed![/b]", markup=True, size_hint_y=0.2, color=ACCENT_RED))
-        content.add_widget(self.wrap_label(
-            text=(
-                f"You wrongly accused {wrongly_accused_player['name']} (Local). They are now removed from play.\n"
+        wrongly_accused_name = self.engine.name(outcome['player_index'])
+        active_spies = outcome['active_spies']
+        remaining_locals = outcome['active_locals']
+
+        self.popup_pool.show('outcome', lambda popup: popup.rebind(
+            title='WRONG ACCUSATION',
+            header="[b]Accusation Failed![/b]",
+            header_color=ACCENT_RED,
+            body=(
+                f"You wrongly accused {wrongly_accused_name} (Local). They are now removed from play.\n"
                 f"Status: {active_spies} Spies remain vs {remaining_locals} Locals. The game continues."
             ),
-            markup=True, size_hint_y=0.5, color=TEXT_PRIMARY,
-            text_size=(dp(280), None),
-            halign='center', valign='top'
+            button_text="CONTINUE GAME",
+            action=lambda popup: (popup.dismiss(), self.start_next_round())
         ))
 
-        btn_continue = self.wrap_button(
-            text="CONTINUE GAME",
-            size_hint_y=0.2,
-            height=dp(60),
-            on_press=lambda x: (popup.dismiss(), self.start_next_round()),
-            background_color=ACCENT_GREEN
-            )
-        content.add_widget(btn_continue)
-
-        popup = Popup(title='WRONG ACCUSATION', content=content, size_hint=(0.9, 0.7))
-        popup.open()
 
+    def build_popup_template(self, kind):
+        """PopupPool builder: a new template of this kind, handed back to the pool when dismissed."""
+        template = OutcomePopup(self) if kind == 'outcome' else RolePopup(self)
+        template.bind(on_dismiss=lambda popup: self.popup_pool.release(kind, popup))
+        return template
 
     def wrap_label(self,
                text,
@@ -1612,7 +1688,7 @@ class SpyGame(BoxLayout):
 
 
     # --- Spy only guesses after being accused (EASY MODE ONLY) ---
-    def show_spy_guess_popup(self, accused_player):
+    def show_spy_guess_popup(self, accused_index):
         # Called when any Spy is caught in Easy Mode.
 
         # If the Spy was successfully accused, stop the timer permanently
@@ -1622,7 +1698,7 @@ class SpyGame(BoxLayout):
         content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
         content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
 
-        content.add_widget(self.wrap_label(text=f"SPY ({accused_player['name']}): YOU WERE CAUGHT! GUESS THE WORD FOR A FINAL WIN.", size_hint_y=None, font_size='18sp', color=ACCENT_RED))
+        content.add_widget(self.wrap_label(text=f"SPY ({self.engine.name(accused_index)}): YOU WERE CAUGHT! GUESS THE WORD FOR A FINAL WIN.", size_hint_y=None, font_size='18sp', color=ACCENT_RED))
 
         # --- CRITICAL FIX: Only use words from the current category (plus a few decoys) ---
 
@@ -1637,15 +1713,9 @@ class SpyGame(BoxLayout):
         num_decoys = min(4, len(current_category_words))
         category_decoys = random.sample(current_category_words, k=num_decoys)
 
-        # 3. Get a few decoys from *other* categories for elimination challenge (max 1 or 2)
-        other_category_words = []
-        for cat, words in GAME_TOPICS.items():
-            if cat != self.current_category:
-                other_category_words.extend(words)
-
-        # Ensure we don't pick too many outside decoys
-        num_outside_decoys = min(2, len(other_category_words))
-        outside_decoys = random.sample(other_category_words, k=num_outside_decoys)
+        # 3. Get a few decoys from *other* categories for elimination challenge (max 2)
+        # Drawn uniformly over every other category's words, loaded or not
+        outside_decoys = GAME_TOPICS.sample_outside(self.current_category, k=2)
 
         # Combine all options
         guess_options = set(category_decoys + outside_decoys)
@@ -1659,7 +1729,7 @@ class SpyGame(BoxLayout):
         for word in guess_options:
             btn = Button(
                 text=word,
-                on_press=lambda x, guessed_word=word: self.resolve_spy_guess(guessed_word, popup, accused_player),
+                on_press=lambda x, guessed_word=word: self.resolve_spy_guess(guessed_word, popup, accused_index),
                 size_hint_y=None, height=dp(50), background_color=(0.3, 0.6, 0.9, 1)
             )
             content.add_widget(btn)
@@ -1667,47 +1737,28 @@ class SpyGame(BoxLayout):
         popup = Popup(title=f"SPY'S LAST CHANCE (Category: {self.current_category})", content=content, size_hint=(0.8, 0.9))
         popup.open()
 
-    def resolve_spy_guess(self, guessed_word, popup, accused_player):
+    def resolve_spy_guess(self, guessed_word, popup, accused_index):
         popup.dismiss()
+        # A correct guess wins for the Spy; otherwise the engine checks the win condition
+        self.show_outcome(self.engine.resolve_spy_guess(accused_index, guessed_word))
 
-        if guessed_word == self.secret_word:
-            # SPY WINS! (Regardless of whether they were the last spy)
-            result_text = f"UNBELIEVABLE! The Spy ({accused_player['name']}) correctly guessed the word: [b]{self.secret_word}[/b]!\n\nSpy Wins!"
-            winner = "Spy"
-            self.show_result_popup(winner, result_text)
-        else:
-            # Spy failed the guess. Since this spy is already marked inactive, the game continues.
-
-            # Check win condition immediately after failure
-            if self.check_win_conditions():
-                return
-            else:
-                # Spies remain. Game continues.
-                active_spies = sum(1 for p in self.players if p['is_spy'] and p.get('is_spy_active', True))
-
-                content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
-                content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
-                content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
-
-                content.add_widget(Label(text=f"[b]Spy ({accused_player['name']}) Failed Guess![/b]", markup=True, size_hint_y=0.2, color=ACCENT_RED))
-
-                hidden_word_text = "[color=ff5555]???[/color]"
-
-                content.add_widget(Label(
-                    text=(
-                        f"The Spy failed to guess the word ({hidden_word_text}) and is now removed from play.\n\n"
-                        f"Status: {active_spies} Spies remain. The game continues."
-                        ),
-                    markup=True, size_hint_y=0.5, color=TEXT_PRIMARY,
-                    text_size=(dp(280), None),
-                    halign='center', valign='top'
-                    ))
-
-                btn_continue = self.wrap_button(text="CONTINUE GAME", size_hint_y=0.2, height=dp(60), on_press=lambda x: self.resume_game(popup), background_color=ACCENT_GREEN)
-                content.add_widget(btn_continue)
+    def show_spy_removed_popup(self, outcome):
+        # Spy failed the guess and spies remain. Game continues.
+        accused_name = self.engine.name(outcome['player_index'])
+        active_spies = outcome['active_spies']
+        hidden_word_text = "[color=ff5555]???[/color]"
 
-                popup = Popup(title='SPY REMOVED', content=content, size_hint=(0.9, 0.7))
-                popup.open()
+        self.popup_pool.show('outcome', lambda popup: popup.rebind(
+            title='SPY REMOVED',
+            header=f"[b]Spy ({accused_name}) Failed Guess![/b]",
+            header_color=ACCENT_RED,
+            body=(
+                f"The Spy failed to guess the word ({hidden_word_text}) and is now removed from play.\n\n"
+                f"Status: {active_spies} Spies remain. The game continues."
+            ),
+            button_text="CONTINUE GAME",
+            action=self.resume_game
+        ))
 
     def resume_game(self, popup):
         popup.dismiss()
@@ -1718,69 +1769,94 @@ class SpyGame(BoxLayout):
     def start_next_round(self):
         # This function is ONLY used by EASY/HARD modes
 
-        # 1. Reset current player index to *an* active player
-        active_player_indices = [i for i, p in enumerate(self.players) if p.get('is_spy_active', True)]
+        # 1. Randomly select the next round starter from *any* active player (no skewing)
+        start_idx = self.engine.random_active_player()
 
-        if not active_player_indices:
+        if start_idx is None:
             # Should not happen if check_win_conditions was called correctly
             self.check_win_conditions()
             return
 
-        # Randomly select the next round starter from *any* active player
-        # No skewing here.
-        start_idx = random.choice(active_player_indices)
         self.current_player_index = start_idx # Set the starting player index for the new round
 
         # 2. Update the game screen with the new starter/direction
         self.update_game_screen()
 
     def show_result_popup(self, winner, text):
-        # FIX: BoxLayout does not support background_color property
-        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
-        content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
-        content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
-
         # NEW: Use conditional color for winner text
         color = '55ff55' if winner == 'Locals' else 'ff5555'
-        content.add_widget(Label(text=f"[b][size=40sp][color={color}]{winner.upper()} WIN![/color][/size][/b]", markup=True, size_hint_y=0.3, color=TEXT_PRIMARY))
-
-        content.add_widget(self.wrap_label(
-            text=text,
-            markup=True,
-            size_hint_y=0.4,
-            font_size='18sp',
-            color=TEXT_PRIMARY,
-            halign='center',
-            valign='middle'
-        ))
-
-        # PRESERVE STATE: The change is here
-        btn_new_game = self.wrap_button(text="START REMATCH (Same Players)", size_hint_y=0.2, height=dp(60), on_press=lambda x: self.reset_game(popup, preserve_config=True), background_color=ACCENT_GREEN)
-        content.add_widget(btn_new_game)
 
+        # PRESERVE STATE: Rematch keeps the same players
         # Popup does not support background_color property
-        popup = Popup(title='GAME OVER', content=content, size_hint=(0.9, 0.7))
-        popup.open()
+        self.popup_pool.show('outcome', lambda popup: popup.rebind(
+            title='GAME OVER',
+            header=f"[b][size=40sp][color={color}]{winner.upper()} WIN![/color][/size][/b]",
+            body=text,
+            body_font_size='18sp',
+            button_text="START REMATCH (Same Players)",
+            action=lambda popup: self.reset_game(popup, preserve_config=True)
+        ))
 
     def check_word_pool_status(self):
-        low_pool_categories = []
-        MIN_WORDS_THRESHOLD = 5 # Changed threshold from 10 to 5
+        low_pool_categories = self.low_pool_categories()
+        if low_pool_categories:
+            self.show_low_pool_warning(low_pool_categories)
 
+    def low_pool_categories(self):
+        """Returns (category, available, total) for every selected category below MIN_WORDS_THRESHOLD."""
+        low_pool_categories = []
         for cat in self.selected_categories:
             if cat not in GAME_TOPICS:
                 continue # Skip if category was deleted somehow
 
             # Calculate remaining words
-            used_count = len(self.total_used_words.get(cat, set()))
-            total_count = len(GAME_TOPICS[cat])
-            available_count = total_count - used_count
+            total_count = self.word_pool.total(cat)
+            available_count = self.word_pool.remaining(cat)
 
             if available_count < MIN_WORDS_THRESHOLD:
                 # Calculate how many words are available before reset
                 low_pool_categories.append((cat, available_count, total_count))
+        return low_pool_categories
 
-        if low_pool_categories:
-            self.show_low_pool_warning(low_pool_categories)
+    def prefetch_low_categories(self):
+        """Queues a background refill for each low category that has none staged or in flight."""
+        if not self.prefetch_enabled or not self.session_api_key:
+            return
+
+        for cat, _, _ in self.low_pool_categories():
+            if cat in self.staged_words or self.generation_pool.is_in_flight(cat):
+                continue
+            trace = self.telemetry.start('prefetch', cat)
+            trace.mark('queue')
+            future, created = self.prefetch_pool.submit(cat, self.call_gemini_api, cat, True, trace)
+            if created:
+                future.add_done_callback(lambda f, c=cat, t=trace: self.on_prefetch_done(c, f, t))
+
+    def on_prefetch_done(self, category_name, future, trace):
+        # Pool thread; failures are silent since nobody is waiting on a refill
+        if future.cancelled() or isinstance(future.exception(), GeminiCancelled):
+            trace.finish('cancelled')
+            return
+        if future.exception() is not None:
+            trace.finish('error')
+            return
+        response_data, cached = future.result()
+        trace.mark('handoff')
+        Clock.schedule_once(lambda dt: self.stage_prefetched_words(category_name, response_data, trace, cached), 0)
+
+    def stage_prefetched_words(self, category_name, response_data, trace=NULL_TRACE, cached=False):
+        trace.end('handoff')
+        try:
+            with trace.timed('parse'):
+                new_words = self.parse_gemini_json(response_data).get('words', [])
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            trace.finish('malformed', cached=cached)
+            return
+        trace.finish('ok' if new_words else 'empty', words=len(new_words), cached=cached)
+        if new_words and category_name in GAME_TOPICS:
+            self.staged_words[category_name] = new_words
+            self.gemini_status = f"Refill for '{category_name}' is ready for review."
+            self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
 
     def show_low_pool_warning(self, low_pool_categories):
         content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
@@ -1791,7 +1867,8 @@ class SpyGame(BoxLayout):
         warning_text += "The following categories are running low on unique words:\n\n"
 
         for cat, available, total in low_pool_categories:
-            warning_text += f"- [b]{cat}[/b]: {available} words left.\n"
+            refill_note = " [i](refill ready)[/i]" if cat in self.staged_words else ""
+            warning_text += f"- [b]{cat}[/b]: {available} words left.{refill_note}\n"
 
         warning_text += "\n[i]Regenerate them via Gemini to ensure maximum replayability![/i]"
 
@@ -1812,6 +1889,12 @@ class SpyGame(BoxLayout):
             background_color=ACCENT_BLUE,
             on_press=lambda x: (warning_popup.dismiss(), self.show_regenerate_popup())
         )
+        # All low categories in one batched request instead of one round-trip each
+        btn_regen_low = self.wrap_button(
+            text="REGENERATE ALL LOW",
+            background_color=ACCENT_BLUE,
+            on_press=lambda x: (warning_popup.dismiss(), self.trigger_gemini_batch_generation([cat for cat, _, _ in low_pool_categories]))
+        )
         btn_ignore = self.wrap_button(
             text="CONTINUE GAME (IGNORE)",
             background_color=ACCENT_GREEN,
@@ -1819,6 +1902,7 @@ class SpyGame(BoxLayout):
         )
 
         control_layout.add_widget(btn_regen)
+        control_layout.add_widget(btn_regen_low)
         control_layout.add_widget(btn_ignore)
         content.add_widget(control_layout)
 
@@ -1835,9 +1919,8 @@ class SpyGame(BoxLayout):
         self.secret_word = ""
         self.is_current_player_spy = False
         self.current_player_index = 0
-        self.role_reveal_order = []
         self.gemini_status = ""
-        self.single_round_accusations = set() # Reset SR tracker
+        self.engine.begin_single_round_accusations() # Reset SR tracker
 
         # --- Config Preservation ---
         if not preserve_config:
@@ -1846,9 +1929,9 @@ class SpyGame(BoxLayout):
             self.spy_count = 1
             self.game_mode = "EASY"
             self.player_names_list = [f"Player {i+1}" for i in range(10)]
-            self.players = []
+            self.engine.reset()
 
-            self.total_used_words = {cat: set() for cat in GAME_TOPICS.keys()}
+            self.word_pool.reset()
 
         # Update UI elements that may have changed
         self.lbl_count.text = str(self.player_count)
@@ -1869,15 +1952,84 @@ class SpyGame(BoxLayout):
         content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
         content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
 
-        content.add_widget(self.wrap_label(text="Select a category to regenerate via Gemini:", color=TEXT_PRIMARY, size_hint_y=None, height=dp(60)))
+        content.add_widget(self.wrap_label(text="Select categories to regenerate via Gemini. Closing this window cancels any that have not finished:", color=TEXT_PRIMARY, size_hint_y=None, height=dp(60)))
+
+        # Categories queued from this popup, cancelled if it is closed before they finish
+        requested = []
+
+        # 0 replaces a category with 10 new words; a refill size merges that many new words in
+        refill_target = [0]
 
+        def regenerate(category, btn):
+            if refill_target[0]:
+                self.trigger_gemini_refill(category, refill_target[0])
+                btn.text = f"Adding {refill_target[0]} words to '{category}'..."
+            else:
+                self.trigger_gemini_generation(category, fresh=chk_fresh.active)
+                btn.text = f"Generating '{category}'..."
+            if category not in requested:
+                requested.append(category)
+
+        def regenerate_all():
+            if refill_target[0]:
+                for category, btn in buttons.items():
+                    regenerate(category, btn)
+                return
+            # Batched: one request per GEMINI_BATCH_SIZE categories
+            keys = self.trigger_gemini_batch_generation(list(buttons), fresh=chk_fresh.active)
+            requested.extend(key for key in keys if key not in requested)
+            for category, btn in buttons.items():
+                btn.text = f"Generating '{category}'..."
+
+        mode_row = BoxLayout(size_hint_y=None, height=dp(44), spacing=dp(5))
+        mode_buttons = {}
+
+        def set_refill_target(target):
+            refill_target[0] = target
+            for value, mode_btn in mode_buttons.items():
+                mode_btn.background_color = ACCENT_BLUE if value == target else LIGHT_BG
+
+        for target in (0,) + REFILL_SIZES:
+            mode_btn = Button(text="Replace (10)" if not target else f"Add {target}",
+                              background_color=ACCENT_BLUE if not target else LIGHT_BG)
+            mode_btn.bind(on_press=lambda x, t=target: set_refill_target(t))
+            mode_buttons[target] = mode_btn
+            mode_row.add_widget(mode_btn)
+        content.add_widget(mode_row)
+
+        category_list = BoxLayout(orientation='vertical', size_hint_y=None, spacing=dp(5))
+        category_list.bind(minimum_height=category_list.setter('height'))
+        buttons = {}
         for cat in GAME_TOPICS.keys():
             btn = Button(text=f"Regenerate '{cat}'", size_hint_y=None, height=dp(50),
-                        background_color=ACCENT_BLUE,
-                        on_press=lambda x, c=cat: (popup.dismiss(), self.trigger_gemini_generation(c, popup)))
-            content.add_widget(btn)
+                        background_color=ACCENT_BLUE)
+            btn.bind(on_press=lambda x, c=cat: regenerate(c, x))
+            buttons[cat] = btn
+            category_list.add_widget(btn)
+
+        scroll_view = ScrollView(do_scroll_x=False)
+        scroll_view.add_widget(category_list)
+        content.add_widget(scroll_view)
+
+        btn_all = self.wrap_button(
+            text="REGENERATE ALL",
+            size_hint_y=None, height=dp(50),
+            on_press=lambda x: regenerate_all(),
+            background_color=ACCENT_GREEN
+        )
+        content.add_widget(btn_all)
+
+        fresh_row, chk_fresh = self.build_fresh_words_toggle()
+        content.add_widget(fresh_row)
+
+        def cancel_requested(instance):
+            cancelled = [c for c in requested if self.generation_pool.cancel(c)]
+            if cancelled:
+                self.gemini_status = f"Cancelled {len(cancelled)} pending generation(s)."
+                self.lbl_gemini_status.text = f"[color=808080]{self.gemini_status}[/color]"
 
         popup = Popup(title='Regenerate Existing Category', content=content, size_hint=(0.9, 0.8))
+        popup.bind(on_dismiss=cancel_requested)
         popup.open()
 
     def show_generation_popup(self, instance):
@@ -1905,11 +2057,14 @@ class SpyGame(BoxLayout):
         btn_generate = self.wrap_button(
             text="QUERY GEMINI FOR 10 NEW WORDS",
             size_hint_y=None, height=dp(60),
-            on_press=lambda x: self.trigger_gemini_generation(self.ti_category_name.text, popup),
+            on_press=lambda x: self.trigger_gemini_generation(self.ti_category_name.text, popup, fresh=chk_fresh.active),
             background_color=ACCENT_BLUE
         )
         popup_content.add_widget(btn_generate)
 
+        fresh_row, chk_fresh = self.build_fresh_words_toggle()
+        popup_content.add_widget(fresh_row)
+
         # FIX: Popup does not support background_color property
         popup = Popup(
             title='AI TOPIC GENERATOR',
@@ -1918,30 +2073,127 @@ class SpyGame(BoxLayout):
         )
         popup.open()
 
+    def build_fresh_words_toggle(self):
+        """Checkbox row for skipping the response cache. Returns (row, checkbox)."""
+        row = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(10))
+        chk_fresh = CheckBox(active=False, size_hint_x=0.2)
+        lbl_fresh = Label(
+            text="[b]Fresh words[/b] (skip cached results)",
+            markup=True, color=TEXT_SECONDARY, halign='left', valign='middle', size_hint_x=0.8
+        )
+        row.add_widget(chk_fresh)
+        row.add_widget(lbl_fresh)
+        return row, chk_fresh
+
+    def generation_stats_text(self):
+        summary = self.telemetry.summary()
+        client = self.gemini_client.state()
+        cache = self.response_cache.stats()
+
+        lines = [f"[b]Requests:[/b] {summary['requests']}  " + "  ".join(f"{k}: {v}" for k, v in sorted(summary['outcomes'].items()))]
+        lines.append(f"[b]Words per response:[/b] {summary['words_per_response']}")
+        if summary['counts']:
+            lines.append("[b]Counters:[/b] " + ", ".join(f"{k}: {v}" for k, v in sorted(summary['counts'].items())))
+        lines.append(f"[b]Cache:[/b] {cache['hits']} hits, {cache['misses']} misses, {cache['entries']} entries")
+        lines.append(f"[b]Circuit:[/b] {client['circuit']['status']} ({client['circuit']['trips']} trips)  "
+                     f"[b]Rate limiter:[/b] {client['rate_limiter']['tokens']} tokens, {client['rate_limiter']['waits']} waits")
+        popups = self.popup_pool.summary()
+        if popups:
+            lines.append("[b]Popup transitions:[/b] " + ", ".join(
+                f"{name} {stats['count']}x {stats['mean_ms']} ms" + (f" {stats['mean_kib']} KiB" if stats['mean_kib'] is not None else "")
+                for name, stats in popups.items()))
+        lines.append("")
+        lines.append("[b]Span (ms)      p50      p95      max[/b]")
+        for name, stats in summary['spans_ms'].items():
+            lines.append(f"{name:<12} {stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['max']:>8.1f}")
+        return "\n".join(lines)
+
+    def show_generation_stats_popup(self):
+        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(10))
+        content.canvas.before.add(Color(*LIGHT_BG))
+        content.canvas.before.add(Rectangle(size=content.size, pos=content.pos))
+
+        stats_label = Label(text=self.generation_stats_text(), markup=True, font_size='13sp', font_name='RobotoMono-Regular',
+                            valign='top', halign='left', color=TEXT_PRIMARY, size_hint_y=None)
+        stats_label.bind(width=lambda s, w: setattr(s, 'text_size', (w, None)))
+        stats_label.bind(texture_size=lambda s, size: setattr(s, 'height', size[1]))
+        stats_scroll = ScrollView(do_scroll_x=False)
+        stats_scroll.add_widget(stats_label)
+        content.add_widget(stats_scroll)
+
+        def export(instance):
+            written = self.telemetry.export_jsonl(GEMINI_TELEMETRY_NAME)
+            self.gemini_status = f"Exported {written} generation traces to {GEMINI_TELEMETRY_NAME}."
+            self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+
+        control_layout = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(10))
+        control_layout.add_widget(self.wrap_button(text="REFRESH", background_color=ACCENT_BLUE,
+                                                   on_press=lambda x: setattr(stats_label, 'text', self.generation_stats_text())))
+        control_layout.add_widget(self.wrap_button(text="EXPORT JSONL", background_color=ACCENT_GREEN, on_press=export))
+        control_layout.add_widget(self.wrap_button(text="CLOSE", background_color=ACCENT_RED, on_press=lambda x: popup.dismiss()))
+        content.add_widget(control_layout)
+
+        popup = Popup(title='AI GENERATION STATS', content=content, size_hint=(0.95, 0.8))
+        popup.open()
+
     def get_gemini_api_url(self):
         """Returns the fully formed API URL using the current session key."""
         # Use GEMINI_MODEL defined globally
-        return f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={self.session_api_key}"
+        return f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:generateContent?key={self.session_api_key}"
+
+    def get_gemini_stream_url(self):
+        """Server-sent-events variant of get_gemini_api_url."""
+        return f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={self.session_api_key}"
 
-    def trigger_gemini_generation(self, category_name, popup):
+    def trigger_gemini_generation(self, category_name, popup=None, fresh=False):
         if not category_name.strip():
             self.gemini_status = "Error: Please enter a category name."
             self.lbl_gemini_status.text = f"[color=ff0000]{self.gemini_status}[/color]"
             return
 
-        popup.dismiss()
+        if popup:
+            popup.dismiss()
+
+        staged = self.staged_words.pop(category_name, None)
+        if staged:
+            # A background refill already fetched this category; review it without waiting
+            self.show_word_review(category_name, staged)
+            return None
+        # The user's request supersedes any background refill for the same category
+        self.prefetch_pool.cancel(category_name)
+
+        # Queue the request on the worker pool; a category already in flight reuses that request
+        worker = self.stream_gemini_api if GEMINI_STREAMING else self.call_gemini_api
+        trace = self.telemetry.start('stream' if GEMINI_STREAMING else 'single', category_name)
+        trace.mark('queue')
+        future, created = self.generation_pool.submit(category_name, worker, category_name, fresh, trace)
+        if not created:
+            self.telemetry.increment('deduplicated')
+            self.gemini_status = f"[b]Already generating '{category_name}'[/b], waiting for that request..."
+            self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+            return future
+
         self.gemini_status = f"[b]Querying Gemini for '{category_name}'...[/b]"
         self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+        future.add_done_callback(lambda f: self.on_generation_done(category_name, f, trace))
+        return future
 
-        # Start the network request in a separate thread
-        threading.Thread(
-            target=self.call_gemini_api,
-            args=(category_name,)
-        ).start()
+    def on_generation_done(self, category_name, future, trace=NULL_TRACE):
+        # Runs on a pool thread (or the cancelling thread); hand the result to the Kivy thread
+        if future.cancelled() or isinstance(future.exception(), GeminiCancelled):
+            trace.finish('cancelled')
+            return
+        error = future.exception()
+        trace.mark('handoff')
+        if error is not None:
+            message = str(error)
+            Clock.schedule_once(lambda dt: self.handle_gemini_result(category_name, None, message, trace=trace), 0)
+            return
 
-    def call_gemini_api(self, category_name):
-        # This runs in a separate thread and MUST NOT interact with the UI directly
+        response_data, cached = future.result()
+        Clock.schedule_once(lambda dt: self.handle_gemini_result(category_name, response_data, cached=cached, trace=trace), 0)
 
+    def build_gemini_payload(self, user_query, response_schema):
         system_prompt = (
             "You are a creative word generator for a party game similar to Spyfall. "
             "Your task is to generate secret words or locations for the given category. "
@@ -1949,137 +2201,475 @@ class SpyGame(BoxLayout):
             "and vague enough to allow conversation without obvious giveaways. "
             "Do not use generic locations like 'school' or 'beach'."
         )
-        user_query = f"Generate 10 unique, creative, and plausible secret proper nouns or fixed entities for the category: '{category_name}'. The items must be single concepts or short phrases (max 4 words)."
-
-        payload = {
+        return {
             "contents": [{ "parts": [{ "text": user_query }] }],
             "systemInstruction": { "parts": [{ "text": system_prompt }] },
             "generationConfig": {
                 "responseMimeType": "application/json",
-                "responseSchema": {
-                    "type": "OBJECT",
-                    "properties": {
-                        "words": {
-                            "type": "ARRAY",
-                            "description": "A list of 10 unique words or short phrases for the category.",
-                            "items": { "type": "STRING" }
-                        }
-                    }
-                }
+                "responseSchema": response_schema
             }
         }
 
-        max_retries = 3
-        delay = 1
-        response_data = None
+    def parse_gemini_json(self, response_data):
+        """Returns the JSON object in a generateContent response. Raises KeyError/IndexError/TypeError/ValueError."""
+        return json.loads(response_data['candidates'][0]['content']['parts'][0]['text'])
+
+    def request_gemini(self, cancel_event, payload, fresh=False, trace=NULL_TRACE):
+        """Returns (response_data, cached). fresh=True skips the cache lookup but still stores the new response."""
+        trace.end('queue')
+        key = cache_key(GEMINI_MODEL, payload)
+        if not fresh:
+            response_data = self.response_cache.get(key)
+            if response_data is not None:
+                trace.count('cache_hits')
+                return response_data, True
 
         if not self.session_api_key:
-            # Schedule the error handler immediately
-            Clock.schedule_once(lambda dt: self.handle_gemini_result(category_name, None, "No API Key Provided."), 0)
-            return
+            trace.count('failure.no_api_key')
+            raise GeminiError("No API Key Provided.")
+
+        try:
+            response_data = self.gemini_client.post_json(self.get_gemini_api_url(), payload, cancel_event, trace)
+        except GeminiCancelled:
+            raise
+        except GeminiError as e:
+            return self.cached_fallback(key, e, trace), True
+        try:
+            # Only cache responses that parse, so a malformed reply is not replayed for the whole TTL
+            self.parse_gemini_json(response_data)
+        except (KeyError, IndexError, TypeError, ValueError):
+            return response_data, False
+        self.response_cache.put(key, response_data)
+        return response_data, False
+
+    def build_word_payload(self, category_name):
+        user_query = f"Generate 10 unique, creative, and plausible secret proper nouns or fixed entities for the category: '{category_name}'. The items must be single concepts or short phrases (max 4 words)."
+        return self.build_gemini_payload(user_query, {
+            "type": "OBJECT",
+            "properties": {
+                "words": {
+                    "type": "ARRAY",
+                    "description": "A list of 10 unique words or short phrases for the category.",
+                    "items": { "type": "STRING" }
+                }
+            }
+        })
+
+    def cached_fallback(self, key, error, trace=NULL_TRACE):
+        """While the API is failing, answers from the cache even if the entry has expired; otherwise re-raises."""
+        response_data = self.response_cache.get(key, allow_expired=True)
+        if response_data is None:
+            raise error
+        trace.count('cache_fallbacks')
+        return response_data
+
+    def call_gemini_api(self, cancel_event, category_name, fresh=False, trace=NULL_TRACE):
+        # This runs on a generation pool thread and MUST NOT interact with the UI directly
+        return self.request_gemini(cancel_event, self.build_word_payload(category_name), fresh, trace)
+
+    def stream_gemini_api(self, cancel_event, category_name, fresh=False, trace=NULL_TRACE):
+        """
+        Streaming version of call_gemini_api: words are handed to the Kivy thread as
+        they arrive, and the assembled response is returned (and cached) at the end.
+        """
+        # Pool thread, like call_gemini_api; words reach the UI only through Clock
+        trace.end('queue')
+        payload = self.build_word_payload(category_name)
+        key = cache_key(GEMINI_MODEL, payload)
+        if not fresh:
+            response_data = self.response_cache.get(key)
+            if response_data is not None:
+                trace.count('cache_hits')
+                return response_data, True
+
+        if not self.session_api_key:
+            trace.count('failure.no_api_key')
+            raise GeminiError("No API Key Provided.")
+
+        parser = WordStreamParser()
+        trace.mark('first_word')
+        try:
+            for event in self.gemini_client.stream_events(self.get_gemini_stream_url(), payload, cancel_event, trace):
+                words = parser.feed(event_text(event))
+                if words:
+                    trace.end('first_word') # Only the first end() after mark() records
+                    Clock.schedule_once(lambda dt, w=words: self.append_stream_words(category_name, w, cancel_event), 0)
+        except GeminiCancelled:
+            raise
+        except GeminiError as e:
+            return self.cached_fallback(key, e, trace), True
+
+        response_data = {'candidates': [{'content': {'parts': [{'text': parser.full_text()}]}}]}
+        try:
+            self.parse_gemini_json(response_data)
+        except (KeyError, IndexError, TypeError, ValueError):
+            return response_data, False
+        self.response_cache.put(key, response_data)
+        return response_data, False
+
+    def append_stream_words(self, category_name, words, cancel_event):
+        """Adds streamed words to the category's review, opening it on the first word."""
+        if cancel_event.is_set():
+            return # The review was closed or accepted; late words are dropped
+        review = self.stream_reviews.get(category_name)
+        if review is None:
+            review = self.stream_reviews[category_name] = self.show_word_review(category_name, [], streaming=True)
+        popup, header, label, review_words = review
+        review_words.extend(words)
+        label.text = self.review_text(category_name, review_words)
+
+    def call_gemini_batch_api(self, cancel_event, category_names, fresh=False, trace=NULL_TRACE):
+        # Same as call_gemini_api, but one request answers several categories (one schema property each)
+        quoted = ", ".join(f"'{name}'" for name in category_names)
+        user_query = f"For each of these categories: {quoted}, generate 10 unique, creative, and plausible secret proper nouns or fixed entities. The items must be single concepts or short phrases (max 4 words). Return them under the exact category name."
+        payload = self.build_gemini_payload(user_query, {
+            "type": "OBJECT",
+            "properties": {
+                name: {
+                    "type": "ARRAY",
+                    "description": f"A list of 10 unique words or short phrases for the category '{name}'.",
+                    "items": { "type": "STRING" }
+                }
+                for name in category_names
+            },
+            "required": list(category_names)
+        })
+        return self.request_gemini(cancel_event, payload, fresh, trace)
+
+    def build_refill_payload(self, category_name, count, exclude):
+        user_query = f"Generate {count} unique, creative, and plausible secret proper nouns or fixed entities for the category: '{category_name}'. The items must be single concepts or short phrases (max 4 words)."
+        if exclude:
+            user_query += " Do not repeat any of these existing words: " + json.dumps(exclude, ensure_ascii=False)
+        return self.build_gemini_payload(user_query, {
+            "type": "OBJECT",
+            "properties": {
+                "words": {
+                    "type": "ARRAY",
+                    "description": f"A list of {count} unique words or short phrases for the category, none of them already listed.",
+                    "items": { "type": "STRING" }
+                }
+            }
+        })
 
-        for attempt in range(max_retries):
+    def call_gemini_refill_api(self, cancel_event, category_name, target, existing_words, trace=NULL_TRACE):
+        """
+        Asks for `target` new words in pages of GEMINI_PAGE_SIZE, sending the words known so far
+        as an exclusion list. Returns (new_words, error); a failure after some pages keeps what arrived.
+        """
+        # Pool thread; progress reaches the UI only through Clock
+        trace.end('queue')
+        if not self.session_api_key:
+            trace.count('failure.no_api_key')
+            raise GeminiError("No API Key Provided.")
+
+        known = list(existing_words)
+        seen = {word.casefold() for word in known}
+        new_words = []
+        max_pages = 2 * -(-target // GEMINI_PAGE_SIZE) # Allow for pages that are mostly repeats
+        for page in range(max_pages):
+            count = min(GEMINI_PAGE_SIZE, target - len(new_words))
+            payload = self.build_refill_payload(category_name, count, known[-GEMINI_EXCLUSION_LIMIT:])
             try:
-                response = requests.post(
-                    self.get_gemini_api_url(),
-                    headers={'Content-Type': 'application/json'},
-                    data=json.dumps(payload),
-                    timeout=15
-                )
-                response.raise_for_status()
-                response_data = response.json()
-                break
-            except requests.exceptions.RequestException:
-                if attempt < max_retries - 1:
-                    threading.Event().wait(delay)
-                    delay *= 2
-                else:
-                    Clock.schedule_once(lambda dt: self.handle_gemini_result(category_name, None, "Network or API failure."), 0)
-                    return
-
-        Clock.schedule_once(lambda dt: self.handle_gemini_result(category_name, response_data), 0)
-
-    def handle_gemini_result(self, category_name, response_data, error=None):
+                response_data = self.gemini_client.post_json(self.get_gemini_api_url(), payload, cancel_event, trace)
+                with trace.timed('parse'):
+                    page_words = self.parse_gemini_json(response_data).get('words', [])
+            except GeminiCancelled:
+                raise
+            except (GeminiError, KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+                if not new_words:
+                    raise GeminiError(str(e) if isinstance(e, GeminiError) else "Failed to parse AI response.")
+                return new_words, str(e) or "Failed to parse AI response."
+            trace.count('pages')
+
+            added = 0
+            for word in page_words:
+                if isinstance(word, str) and word.strip() and word.strip().casefold() not in seen:
+                    seen.add(word.strip().casefold())
+                    known.append(word.strip())
+                    new_words.append(word.strip())
+                    added += 1
+            trace.count('duplicates_dropped', len(page_words) - added)
+
+            progress = len(new_words)
+            Clock.schedule_once(lambda dt: self.show_refill_progress(category_name, progress, target), 0)
+            if len(new_words) >= target or not added:
+                break # Done, or the model has run out of new ideas for this category
+        return new_words[:target], None
+
+    def trigger_gemini_refill(self, category_name, target):
+        """Queues a paginated refill that merges `target` new words into an existing category."""
+        existing_words = list(GAME_TOPICS[category_name]) if category_name in GAME_TOPICS else []
+        trace = self.telemetry.start('refill', category_name)
+        trace.mark('queue')
+        future, created = self.generation_pool.submit(category_name, self.call_gemini_refill_api, category_name, target, existing_words, trace)
+        if not created:
+            self.telemetry.increment('deduplicated')
+            self.gemini_status = f"[b]Already generating '{category_name}'[/b], waiting for that request..."
+            self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+            return future
+
+        self.show_refill_progress(category_name, 0, target)
+        future.add_done_callback(lambda f: self.on_refill_done(category_name, f, trace))
+        return future
+
+    def show_refill_progress(self, category_name, received, target):
+        self.gemini_status = f"[b]Refilling '{category_name}'...[/b] {received}/{target} new words"
+        self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+
+    def on_refill_done(self, category_name, future, trace=NULL_TRACE):
+        # Pool thread; same hand-off rules as on_generation_done
+        if future.cancelled() or isinstance(future.exception(), GeminiCancelled):
+            trace.finish('cancelled')
+            return
+        error = future.exception()
+        trace.mark('handoff')
+        if error is not None:
+            message = str(error)
+            Clock.schedule_once(lambda dt: self.handle_gemini_result(category_name, None, message, trace=trace), 0)
+            return
+
+        new_words, partial_error = future.result()
+        Clock.schedule_once(lambda dt: self.handle_refill_result(category_name, new_words, partial_error, trace), 0)
+
+    def handle_refill_result(self, category_name, new_words, partial_error=None, trace=NULL_TRACE):
+        trace.end('handoff')
+        trace.finish('partial' if partial_error else ('ok' if new_words else 'empty'), words=len(new_words))
+        if not new_words:
+            self.gemini_status = f"[b]ERROR:[/b] AI returned no new words for '{category_name}'."
+            self.lbl_gemini_status.text = f"[color=ff0000]{self.gemini_status}[/color]"
+            return
+        self.show_word_review(category_name, new_words, merge=True)
+        if partial_error:
+            self.gemini_status = f"[b]PARTIAL REFILL:[/b] {len(new_words)} words before an error ({partial_error}). Review below."
+            self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+
+    def trigger_gemini_batch_generation(self, category_names, fresh=False):
+        """Regenerates several categories with one request per GEMINI_BATCH_SIZE categories. Returns the pool keys."""
+        keys = []
+        staged = [c for c in category_names if c in self.staged_words]
+        for category_name in staged:
+            # Already refilled in the background; reviewed straight away
+            self.trigger_gemini_generation(category_name)
+        category_names = [c for c in category_names if c not in staged]
+        for category_name in category_names:
+            self.prefetch_pool.cancel(category_name)
+
+        for start in range(0, len(category_names), GEMINI_BATCH_SIZE):
+            batch = tuple(category_names[start:start + GEMINI_BATCH_SIZE])
+            if len(batch) == 1:
+                self.trigger_gemini_generation(batch[0], fresh=fresh)
+                keys.append(batch[0])
+                continue
+
+            key = ('batch',) + batch
+            trace = self.telemetry.start('batch', ", ".join(batch))
+            trace.mark('queue')
+            future, created = self.generation_pool.submit(key, self.call_gemini_batch_api, batch, fresh, trace)
+            if created:
+                future.add_done_callback(lambda f, b=batch, fr=fresh, t=trace: self.on_batch_generation_done(b, fr, f, t))
+            keys.append(key)
+
+        self.gemini_status = f"[b]Querying Gemini for {len(category_names)} categories...[/b]"
+        self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+        return keys
+
+    def on_batch_generation_done(self, category_names, fresh, future, trace=NULL_TRACE):
+        # Pool thread; same hand-off rules as on_generation_done
+        if future.cancelled() or isinstance(future.exception(), GeminiCancelled):
+            trace.finish('cancelled')
+            return
+        error = future.exception()
+        trace.mark('handoff')
+        if error is not None:
+            Clock.schedule_once(lambda dt: self.handle_gemini_batch_error(category_names, fresh, trace), 0)
+            return
+
+        response_data, cached = future.result()
+        Clock.schedule_once(lambda dt: self.handle_gemini_batch_result(category_names, response_data, fresh, cached, trace), 0)
+
+    def handle_gemini_batch_result(self, category_names, response_data, fresh, cached=False, trace=NULL_TRACE):
+        """Routes a batch response to one review per category; missing or malformed categories are retried one by one."""
+        trace.end('handoff')
+        try:
+            with trace.timed('parse'):
+                parsed_json = self.parse_gemini_json(response_data)
+            if not isinstance(parsed_json, dict):
+                parsed_json = {}
+        except (KeyError, IndexError, TypeError, ValueError):
+            parsed_json = {}
+
+        retry = []
+        word_count = 0
+        for category_name in category_names:
+            new_words = parsed_json.get(category_name)
+            if isinstance(new_words, list):
+                new_words = [word for word in new_words if isinstance(word, str) and word.strip()]
+            if new_words:
+                word_count += len(new_words)
+                self.show_word_review(category_name, new_words, cached)
+            else:
+                retry.append(category_name)
+
+        trace.count('batch_fallbacks', len(retry))
+        outcome = 'ok' if not retry else ('partial' if len(retry) < len(category_names) else 'malformed')
+        trace.finish(outcome, words=word_count, cached=cached)
+        for category_name in retry:
+            self.trigger_gemini_generation(category_name, fresh=fresh)
+
+    def handle_gemini_batch_error(self, category_names, fresh, trace=NULL_TRACE):
+        """A failed batch request falls back to one request per category, each reporting its own result or error."""
+        trace.end('handoff')
+        trace.count('batch_fallbacks', len(category_names))
+        trace.finish('error')
+        for category_name in category_names:
+            self.trigger_gemini_generation(category_name, fresh=fresh)
+
+    def handle_gemini_result(self, category_name, response_data, error=None, cached=False, trace=NULL_TRACE):
         # This function runs back on the main Kivy thread
+        trace.end('handoff')
+
+        review = self.stream_reviews.pop(category_name, None)
+        if review is not None:
+            self.finish_stream_review(category_name, review, response_data, error, trace)
+            return
 
         if error:
-            self.gemini_status = f"[b]ERROR:[/b] Failed to query AI: {error}"
+            trace.finish('error')
+            circuit = self.gemini_client.state()['circuit']
+            self.gemini_status = f"[b]ERROR:[/b] Failed to query AI for '{category_name}': {error}"
+            if circuit['status'] != 'closed':
+                self.gemini_status += f" (API marked unavailable, circuit {circuit['status']})"
             self.lbl_gemini_status.text = f"[color=ff0000]{self.gemini_status}[/color]"
             return
 
         try:
-            json_text = response_data['candidates'][0]['content']['parts'][0]['text']
-            parsed_json = json.loads(json_text)
-            new_words = parsed_json.get('words', [])
+            with trace.timed('parse'):
+                parsed_json = self.parse_gemini_json(response_data)
+                new_words = parsed_json.get('words', [])
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            trace.finish('malformed', cached=cached)
+            self.gemini_status = f"[b]ERROR:[/b] Failed to parse AI response."
+            self.lbl_gemini_status.text = f"[color=ff0000]{self.gemini_status}[/color]"
+            return
 
-            if new_words:
-                # Add the new words to the session's topic pool (Temporarily before confirmation)
-                # We will only permanently save them if the user accepts.
-                temp_topic_pool = GAME_TOPICS.copy()
-                temp_topic_pool[category_name] = new_words
-
-                # Update status and show review
-                self.gemini_status = f"[b]WORDS GENERATED![/b] Review below."
-                self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
-
-                content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
-                content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
-                content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
-
-                review_text = f"Category: [b]{category_name}[/b]\n\n"
-                review_text += "Review words for appropriateness before playing:\n" + "\n".join(new_words)
-
-                # ... (content creation) ...
-                content.add_widget(Label(text="[b]NEW WORDS GENERATED[/b]", markup=True, size_hint_y=0.2, color=TEXT_PRIMARY))
-
-                # Use ScrollView for review text in case there are many words
-                review_scroll = ScrollView(size_hint_y=0.6)
-                review_label = Label(text=review_text, markup=True, font_size='14sp', valign='top', halign='left', color=TEXT_SECONDARY, text_size=(dp(280), None))
-                review_label.bind(texture_size=review_label.setter('size'))
-                review_scroll.add_widget(review_label)
-                content.add_widget(review_scroll)
-
-                # Button Control Layout
-                control_layout = BoxLayout(size_hint_y=0.2, spacing=dp(10))
-
-                # NEW: Accept Button
-                btn_accept = self.wrap_button(
-                    text="ACCEPT & ADD TOPIC",
-                    background_color=ACCENT_GREEN,
-                    height=dp(50),
-                    on_press=lambda x: self.finalize_new_topic(category_name, new_words, review_popup, accepted=True))
-                # NEW: Reject Button
-                btn_reject = self.wrap_button(
-                    text="REJECT & DISCARD",
-                    background_color=ACCENT_RED,
-                    height=dp(50),
-                    on_press=lambda x: self.finalize_new_topic(category_name, new_words, review_popup, accepted=False))
-
-                control_layout.add_widget(btn_reject)
-                control_layout.add_widget(btn_accept)
-                content.add_widget(control_layout)
-
-                review_popup = Popup(title='CONTENT REVIEW', content=content, size_hint=(0.9, 0.8))
-                review_popup.open()
+        trace.finish('ok' if new_words else 'empty', words=len(new_words), cached=cached)
+        if new_words:
+            # The new words are only added to the topic pool (and saved) if the user accepts.
+            self.show_word_review(category_name, new_words, cached)
+        else:
+            self.gemini_status = "[b]ERROR:[/b] AI returned empty list of words."
+            self.lbl_gemini_status.text = f"[color=ff0000]{self.gemini_status}[/color]"
 
-            else:
-                self.gemini_status = "[b]ERROR:[/b] AI returned empty list of words."
+    def finish_stream_review(self, category_name, review, response_data, error=None, trace=NULL_TRACE):
+        """Settles a streamed review once its request ends; the full parse wins over the streamed words."""
+        popup, header, label, review_words = review
+        if error:
+            trace.finish('error', words=len(review_words))
+            if not review_words:
+                popup.dismiss()
+                self.gemini_status = f"[b]ERROR:[/b] Failed to query AI for '{category_name}': {error}"
                 self.lbl_gemini_status.text = f"[color=ff0000]{self.gemini_status}[/color]"
+                return
+            header.text = "[b]STREAM INTERRUPTED[/b] (partial list)"
+            return
 
-        except (KeyError, json.JSONDecodeError, IndexError) as e:
-            self.gemini_status = f"[b]ERROR:[/b] Failed to parse AI response."
-            self.lbl_gemini_status.text = f"[color=ff0000]{self.gemini_status}[/color]"
+        try:
+            with trace.timed('parse'):
+                final_words = self.parse_gemini_json(response_data).get('words', [])
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            final_words = []
+        trace.finish('ok' if final_words else 'malformed', words=len(final_words or review_words))
+        if final_words:
+            review_words[:] = final_words
+            label.text = self.review_text(category_name, review_words)
+        header.text = "[b]NEW WORDS GENERATED[/b]"
+        self.gemini_status = f"[b]WORDS GENERATED![/b] Review below."
+        self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
+
+    def review_text(self, category_name, words):
+        review_text = f"Category: [b]{category_name}[/b]\n\n"
+        review_text += "Review words for appropriateness before playing:\n" + "\n".join(words)
+        return review_text
+
+    def show_word_review(self, category_name, new_words, cached=False, streaming=False, merge=False):
+        """
+        Opens the accept/reject review for generated words and returns
+        (popup, header, label, words). With streaming=True the list may still grow,
+        the words can be accepted early, and closing the popup cancels the request.
+        With merge=True accepting adds the words to the category instead of replacing it.
+        """
+        if streaming:
+            self.gemini_status = f"[b]RECEIVING WORDS...[/b] Review below."
+        elif cached:
+            stats = self.response_cache.stats()
+            self.gemini_status = f"[b]WORDS LOADED FROM CACHE![/b] Review below. (Tick 'Fresh words' for new ones; cache hits: {stats['hits']}, misses: {stats['misses']})"
+        else:
+            self.gemini_status = f"[b]WORDS GENERATED![/b] Review below."
+        self.lbl_gemini_status.text = f"[color=8080ff]{self.gemini_status}[/color]"
 
-    def finalize_new_topic(self, category_name, new_words, popup, accepted):
+        content = BoxLayout(orientation='vertical', padding=dp(20), spacing=dp(20))
+        content.canvas.before.add(kivy.graphics.Color(*LIGHT_BG))
+        content.canvas.before.add(kivy.graphics.Rectangle(size=content.size, pos=content.pos))
+
+        review_text = self.review_text(category_name, new_words)
+
+        # ... (content creation) ...
+        header = Label(text="[b]RECEIVING WORDS...[/b]" if streaming else "[b]NEW WORDS GENERATED[/b]", markup=True, size_hint_y=0.2, color=TEXT_PRIMARY)
+        content.add_widget(header)
+
+        # Use ScrollView for review text in case there are many words
+        review_scroll = ScrollView(size_hint_y=0.6)
+        review_label = Label(text=review_text, markup=True, font_size='14sp', valign='top', halign='left', color=TEXT_SECONDARY, text_size=(dp(280), None))
+        review_label.bind(texture_size=review_label.setter('size'))
+        review_scroll.add_widget(review_label)
+        content.add_widget(review_scroll)
+
+        # Button Control Layout
+        control_layout = BoxLayout(size_hint_y=0.2, spacing=dp(10))
+
+        # NEW: Accept Button
+        btn_accept = self.wrap_button(
+            text=f"ACCEPT & ADD {len(new_words)} WORDS" if merge else "ACCEPT & ADD TOPIC",
+            background_color=ACCENT_GREEN,
+            height=dp(50),
+            on_press=lambda x: self.finalize_new_topic(category_name, list(new_words), review_popup, accepted=True, merge=merge))
+        # NEW: Reject Button
+        btn_reject = self.wrap_button(
+            text="REJECT & DISCARD",
+            background_color=ACCENT_RED,
+            height=dp(50),
+            on_press=lambda x: self.finalize_new_topic(category_name, list(new_words), review_popup, accepted=False))
+
+        control_layout.add_widget(btn_reject)
+        control_layout.add_widget(btn_accept)
+        content.add_widget(control_layout)
+
+        review_popup = Popup(title='CONTENT REVIEW', content=content, size_hint=(0.9, 0.8))
+        if streaming:
+            def stop_stream(instance):
+                # Accepting early, rejecting or closing the review ends the stream
+                if self.stream_reviews.get(category_name, (None,))[0] is review_popup:
+                    del self.stream_reviews[category_name]
+                    self.generation_pool.cancel(category_name)
+            review_popup.bind(on_dismiss=stop_stream)
+        review_popup.open()
+        return review_popup, header, review_label, new_words
+
+    def finalize_new_topic(self, category_name, new_words, popup, accepted, merge=False):
+        global GAME_TOPICS
         popup.dismiss()
 
-        if accepted:
-            global GAME_TOPICS
+        if accepted and merge and category_name in GAME_TOPICS:
+            self.merge_topic_words(category_name, new_words)
+            color_tag = "00cc00"
+        elif accepted:
+            # A staged refill was built for the old word list
+            self.staged_words.pop(category_name, None)
             GAME_TOPICS[category_name] = new_words
-            self.total_used_words[category_name] = set()
+            self.word_pool.replace(category_name, new_words)
             if category_name not in self.selected_categories:
                  self.selected_categories.append(category_name)
-            self.save_topics_to_store()
+            self.save_topic_to_store(category_name)
 
             self.gemini_status = f"[b]SUCCESS![/b] New category '{category_name}' added ({len(new_words)} words)."
             color_tag = "00cc00"
@@ -2092,11 +2682,31 @@ class SpyGame(BoxLayout):
             f"[color=808080]Available Categories:[/color] " + ", ".join(GAME_TOPICS.keys())
         )
 
-    def save_topics_to_store(self):
-        """Saves the current state of GAME_TOPICS to JsonStore."""
-        global GAME_TOPICS
+    def merge_topic_words(self, category_name, new_words):
+        """Adds words to an existing category, keeping its current words and this session's used ones."""
+        existing = GAME_TOPICS[category_name]
+        seen = {word.casefold() for word in existing}
+        added = []
+        for word in new_words:
+            if word.casefold() not in seen:
+                seen.add(word.casefold())
+                added.append(word)
+
+        merged = list(existing) + added
+        GAME_TOPICS[category_name] = merged
+        self.word_pool.add_words(category_name, added)
+        self.staged_words.pop(category_name, None)
+        if self.store.has_category(category_name):
+            self.store.append_words(category_name, added)
+        else:
+            # Built-in categories are only stored once edited, so store the whole list
+            self.save_topic_to_store(category_name)
 
-        self.store.put('topics', topics=GAME_TOPICS)
+        self.gemini_status = f"[b]SUCCESS![/b] Added {len(added)} words to '{category_name}' ({len(merged)} total)."
+
+    def save_topic_to_store(self, category_name):
+        """Saves a single category of GAME_TOPICS to the SQLite topic store."""
+        self.store.put_category(category_name, GAME_TOPICS[category_name])
 
 class SpyfallApp(App):
     def build(self):
@@ -2104,6 +2714,20 @@ class SpyfallApp(App):
         self.title = "Word Spyfall AI Edition"
         return SpyGame()
 
+    def on_stop(self):
+        # Drop queued generations and release the pooled Gemini connections
+        self.root.generation_pool.shutdown()
+        self.root.prefetch_pool.shutdown()
+        self.root.gemini_client.close()
+        self.root.response_cache.close()
+        # Write any library edits still waiting on the save debounce
+        self.root.flush_player_library()
+
+    def on_pause(self):
+        # Android usually kills a paused app without calling on_stop, so persist pending edits now
+        self.root.flush_player_library()
+        return True
+
 if __name__ == '__main__':
     # Add dependency imports for Kivy graphics after App class definition
     import kivy.graphics
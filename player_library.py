@@ -0,0 +1,196 @@
+"""
+Player library helpers for Word Spyfall.
+
+NameIndex keeps every library name in one sorted list of case-folded keys,
+so the library popups' type-ahead search is a bisect to the first key with
+the typed prefix followed by a walk over the matches (O(log n + k)), instead
+of sorting and filtering the whole library on every keystroke. Callers fetch
+one page of matches at a time (limit/after), so k stays small even for an
+empty or one-letter query.
+
+LibraryStore persists the library in the JsonStore layout the app has always
+used ({"library": {"players": {...}}}). Snapshots are written atomically
+(temp file, fsync, rename), so a crash mid-save leaves the previous file
+intact. In journal mode each add/remove is appended to a side file instead,
+and the snapshot is only rewritten once the journal grows past
+compact_every entries. Compaction journals the pending changes before it
+rewrites the snapshot, so a crash before the journal is emptied replays to
+the same library. The caller decides when to flush (the app debounces
+it with a Clock trigger).
+Kivy-free, so it can be exercised without the app.
+"""
+import bisect
+import json
+import os
+
+DEFAULT_COMPACT_EVERY = 100 # Journal entries before the snapshot is rewritten
+
+
+def sort_key(name):
+    """Case-insensitive order; the original name breaks ties so 'ann' and 'Ann' can both be listed."""
+    return (name.casefold(), name)
+
+
+def matches(name, query):
+    """True if name starts with query, ignoring case and surrounding whitespace."""
+    return name.casefold().startswith(query.strip().casefold())
+
+
+class NameIndex:
+    """Sorted index over player names supporting case-insensitive prefix search."""
+
+    def __init__(self, names=()):
+        self.keys = sorted(sort_key(name) for name in set(names))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, name):
+        key = sort_key(name)
+        i = bisect.bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def __iter__(self):
+        return (name for _, name in self.keys)
+
+    def add(self, name):
+        """Inserts name in sorted position. Returns False if it was already indexed."""
+        key = sort_key(name)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return False
+        self.keys.insert(i, key)
+        return True
+
+    def remove(self, name):
+        """Drops name from the index. Returns False if it was not indexed."""
+        key = sort_key(name)
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            del self.keys[i]
+            return True
+        return False
+
+    def search(self, query="", exclude=(), limit=None, after=None):
+        """
+        Names starting with query (case-insensitive) in sorted order, skipping
+        any in exclude. An empty query lists every name. At most limit names
+        are returned; pass the last name of a page as after to get the next one.
+        """
+        prefix = query.strip().casefold()
+        keys = self.keys
+        results = []
+        # (prefix,) sorts before every (folded, name) key that starts with prefix
+        i = bisect.bisect_left(keys, (prefix,))
+        if after is not None:
+            i = max(i, bisect.bisect_right(keys, sort_key(after)))
+        while i < len(keys) and keys[i][0].startswith(prefix):
+            if limit is not None and len(results) >= limit:
+                break
+            name = keys[i][1]
+            if name not in exclude:
+                results.append(name)
+            i += 1
+        return results
+
+
+def write_atomic(path, data):
+    """Writes data as JSON to path via a fsynced temp file renamed over it."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class LibraryStore:
+    """Crash-safe storage for the player library, with an optional append-only journal."""
+
+    def __init__(self, path, journal=False, compact_every=DEFAULT_COMPACT_EVERY):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.journal = journal
+        self.compact_every = compact_every
+        self.journal_entries = 0
+        self.journal_size = 0 # Bytes of intact entries; anything past it is a torn line
+        self.pending = []
+        self.dirty = False
+        self.torn = False
+
+    def load(self):
+        """Returns the players dict: the snapshot with any journal entries replayed over it."""
+        players = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                players = json.load(f).get('library', {}).get('players', {})
+        except (OSError, ValueError):
+            pass
+
+        try:
+            with open(self.journal_path, 'rb') as f:
+                lines = f.readlines()
+        except OSError:
+            lines = []
+        self.journal_entries = self.journal_size = 0
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                entry = None
+            if entry is None or not line.endswith(b'\n'):
+                # A torn final line from a crash mid-append; everything before it is good, and the
+                # next flush cuts it off so later entries are not appended after the damage
+                self.torn = self.dirty = True
+                break
+            if entry['op'] == 'add':
+                players[entry['name']] = entry['data']
+            else:
+                players.pop(entry['name'], None)
+            self.journal_entries += 1
+            self.journal_size += len(line)
+        return players
+
+    def record_add(self, name, data):
+        self.pending.append({'op': 'add', 'name': name, 'data': data})
+        self.dirty = True
+
+    def record_remove(self, name):
+        self.pending.append({'op': 'remove', 'name': name})
+        self.dirty = True
+
+    def flush(self, players):
+        """Persists every change recorded since the last flush. players is the current full library."""
+        if not self.dirty:
+            return
+        if self.journal and self.journal_entries + len(self.pending) <= self.compact_every:
+            self.append(self.pending)
+        else:
+            self.compact(players)
+        self.pending = []
+        self.dirty = False
+
+    def append(self, entries):
+        """Appends entries to the journal and fsyncs it, first cutting off any torn final line."""
+        data = ''.join(json.dumps(entry) + '\n' for entry in entries).encode('utf-8')
+        with open(self.journal_path, 'ab') as f:
+            if self.torn:
+                f.truncate(self.journal_size)
+                self.torn = False
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_entries += len(entries)
+        self.journal_size += len(data)
+
+    def compact(self, players):
+        """Rewrites the snapshot and empties the journal."""
+        if self.journal_entries or self.torn:
+            # The journal is replayed over the new snapshot until it is emptied, so a crash in
+            # between must find it complete: replaying every change made since the old snapshot
+            # gives back players exactly, whereas replaying only part of it could undo newer ones
+            self.append(self.pending)
+        write_atomic(self.path, {'library': {'players': players}})
+        if self.journal_entries:
+            open(self.journal_path, 'w').close()
+            self.journal_entries = self.journal_size = 0
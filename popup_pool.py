@@ -0,0 +1,74 @@
+"""
+Reusable popup templates for Word Spyfall.
+
+Outcome and role popups used to be rebuilt for every event: a fresh Popup,
+content layout, canvas instructions, labels, buttons and closures. PopupPool
+keeps built templates by kind and hands a free one back out, so a transition
+only rebinds the template's text slots and action. A template is free again
+once its popup is dismissed (the builder wires that up via release()), but is
+only handed out again once ready(template) says it has finished closing.
+
+Every transition is timed with perf_counter, split by whether the template
+had to be built or was reused, so the saving per transition can be read off
+summary(). With measure_memory=True the net Python allocations of each
+transition are traced with tracemalloc as well (slow; debug builds only).
+Only running totals are kept, so measuring costs no memory over a session.
+Kivy-free: the widgets come from the build callback.
+"""
+import time
+import tracemalloc
+
+
+class PopupPool:
+    """Free templates per kind, plus transition timings for built vs. reused templates."""
+
+    def __init__(self, build, ready=lambda template: True, measure_memory=False):
+        self.build = build
+        self.ready = ready
+        self.free = {}
+        self.measure_memory = measure_memory
+        # Per 'built'/'reused': [transitions, total ms, total KiB]
+        self.transitions = {'built': [0, 0.0, 0.0], 'reused': [0, 0.0, 0.0]}
+        if measure_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def acquire(self, kind):
+        """Returns (template, built): a free template of this kind that is ready, or a newly built one."""
+        free = self.free.get(kind, [])
+        for i in range(len(free) - 1, -1, -1):
+            if self.ready(free[i]):
+                return free.pop(i), False
+        return self.build(kind), True
+
+    def release(self, kind, template):
+        free = self.free.setdefault(kind, [])
+        if template not in free: # A popup can be dismissed twice
+            free.append(template)
+
+    def show(self, kind, bind):
+        """Acquires a template, lets bind(template) fill its slots, then opens it. Returns the template."""
+        memory_before = tracemalloc.get_traced_memory()[0] if self.measure_memory else 0
+        started = time.perf_counter()
+
+        template, built = self.acquire(kind)
+        bind(template)
+        template.open()
+
+        totals = self.transitions['built' if built else 'reused']
+        totals[0] += 1
+        totals[1] += 1000 * (time.perf_counter() - started)
+        if self.measure_memory:
+            totals[2] += (tracemalloc.get_traced_memory()[0] - memory_before) / 1024
+        return template
+
+    def summary(self):
+        """Per 'built'/'reused': transition count, mean ms and mean KiB allocated (None unless measuring memory)."""
+        summary = {}
+        for name, (count, total_ms, total_kib) in self.transitions.items():
+            if count:
+                summary[name] = {
+                    'count': count,
+                    'mean_ms': round(total_ms / count, 2),
+                    'mean_kib': round(total_kib / count, 1) if self.measure_memory else None,
+                }
+        return summary
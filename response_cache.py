@@ -0,0 +1,98 @@
+"""
+On-disk cache for Gemini generateContent responses.
+
+Entries are content-addressed: the key is a SHA-256 of the model name and the
+full request payload (prompt, system instruction and response schema), so any
+change to what is asked produces a new entry. Entries expire after a TTL and
+the least recently used ones are evicted once the cache holds max_entries.
+Expired entries stay on disk until evicted, so they can still be served as a
+fallback (allow_expired=True) while the API is unavailable.
+Kivy-free and safe to share between the generation pool's worker threads.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_TTL = 7 * 24 * 60 * 60 # Seconds a cached response stays valid
+DEFAULT_MAX_ENTRIES = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+def cache_key(model, payload):
+    """Content address of a request: sha256 over the model and the canonical JSON payload."""
+    canonical = json.dumps({'model': model, 'payload': payload}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed response cache with TTL expiry, LRU eviction and hit/miss counters."""
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def get(self, key, allow_expired=False):
+        """Returns the cached response for key, or None on a miss (or an expired entry, unless allow_expired)."""
+        now = self.clock()
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (now - row[1] > self.ttl and not allow_expired):
+                self.misses += 1
+                return None
+
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        """Stores a response, evicting the least recently used entries beyond max_entries."""
+        now = self.clock()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(response), now, now)
+            )
+            self.conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def discard(self, key):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def purge_expired(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM responses WHERE created_at < ?", (self.clock() - self.ttl,))
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self)}
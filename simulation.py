@@ -0,0 +1,353 @@
+"""
+Monte Carlo balance simulator for Word Spyfall.
+
+Runs large batches of synthetic games for every game mode, player count and
+spy count allowed by the setup screen and reports win-rate tables, including
+the effect of the 85% Local start skew applied in GameEngine.choose_first_round_starter.
+The skew only changes who starts Round 1; it reaches the win rates solely
+through the assumed --spy-start-bonus (a Spy who started is easier to catch in
+the first accusation), which is a modelling guess, not a measured effect. The
+report header prints its value; pass --spy-start-bonus 0 to see the outcomes
+without it.
+
+Games are simulated in bulk with NumPy: one array slot per game holding the
+number of active Spies and Locals, and every accusation round is drawn for all
+undecided games at once. Roles are exchangeable, so these counts carry the same
+information as a full per-player role assignment while staying O(games).
+
+Development tool only: requires NumPy, which is not bundled with the app.
+
+    python simulation.py --games 20000 --max-players 30
+"""
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from game_engine import (
+    GAME_MODES, MODE_EASY, MODE_SINGLE_ROUND, LOCAL_START_SKEW, MIN_PLAYERS, max_spies_for,
+)
+
+MAX_PLAYERS = 100
+DEFAULT_GAMES = 2000
+# Accusation accuracy: 0.0 accuses uniformly at random, 1.0 always finds an active Spy
+DEFAULT_SKILL = 0.25
+# Easy Mode final guess: correct word + up to 4 category decoys + 2 outside decoys
+DEFAULT_GUESS_RATE = 1 / 7
+# Extra chance to catch a Spy in the first accusation when that Spy started Round 1
+DEFAULT_SPY_START_BONUS = 0.15
+# Grid cells simulated by one worker task of a parallel sweep
+DEFAULT_CELLS_PER_SHARD = 64
+CHUNK_SIZE = 2000000 # Simulated games held in memory at once
+
+def spy_counts_for(player_count):
+    """Every spy count change_spy_count allows for a player count."""
+    return range(1, max(1, max_spies_for(player_count)) + 1)
+
+
+def accusation_hit_chance(active_spies, active_players, skill):
+    """Chance that an accusation lands on an active Spy under the skill model."""
+    return skill + (1 - skill) * active_spies / active_players
+
+
+def simulate_cell(player_count, spy_count, game_mode, games=DEFAULT_GAMES, rng=None, **options):
+    """Simulates `games` games for one (player_count, spy_count, game_mode) cell."""
+    return simulate_cells([(player_count, spy_count)], game_mode, games, rng=rng, **options)[0]
+
+
+def simulate_cells(cells, game_mode, games=DEFAULT_GAMES, skill=DEFAULT_SKILL,
+                   guess_rate=DEFAULT_GUESS_RATE, local_start_skew=LOCAL_START_SKEW,
+                   spy_start_bonus=DEFAULT_SPY_START_BONUS, rng=None):
+    """
+    Simulates `games` games for every (player_count, spy_count) cell of one game mode.
+    All cells are drawn together, in chunks of at most CHUNK_SIZE games.
+    Returns one dict of outcome counts per cell, in the order given.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    cells = list(cells)
+    cells_per_chunk = max(1, CHUNK_SIZE // games)
+
+    results = []
+    for start in range(0, len(cells), cells_per_chunk):
+        chunk = np.array(cells[start:start + cells_per_chunk], dtype=np.int32).reshape(-1, 2)
+        if game_mode == MODE_SINGLE_ROUND:
+            counts = _simulate_single_round(chunk[:, 0], chunk[:, 1], games, skill, rng)
+        else:
+            counts = _simulate_long_mode(chunk[:, 0], chunk[:, 1], game_mode, games, skill,
+                                         guess_rate, local_start_skew, spy_start_bonus, rng)
+
+        for i, (player_count, spy_count) in enumerate(chunk.tolist()):
+            result = {'player_count': player_count, 'spy_count': spy_count, 'game_mode': game_mode, 'games': games}
+            result.update({key: int(values[i]) for key, values in counts.items()})
+            result['spy_wins'] = games - result['locals_wins']
+            results.append(result)
+    return results
+
+
+def _simulate_long_mode(player_counts, spy_counts, game_mode, games, skill, guess_rate,
+                        local_start_skew, spy_start_bonus, rng):
+    """EASY/HARD: accusation rounds until check_win_conditions decides every game."""
+    cell_count = len(player_counts)
+    live_cell = np.repeat(np.arange(cell_count), games)
+    spies = spy_counts[live_cell].copy()
+    locals_ = player_counts[live_cell] - spies
+
+    # Round 1 starter: uniform draw, then a Spy starter is re-rolled to a Local with the skew chance
+    spy_drawn = rng.random(live_cell.size) < spies / player_counts[live_cell]
+    spy_started = spy_drawn & ~(rng.random(live_cell.size) < local_start_skew)
+
+    counts = {
+        'locals_wins': np.zeros(cell_count, dtype=np.int64),
+        'spy_guess_wins': np.zeros(cell_count, dtype=np.int64),
+        'spy_started': np.bincount(live_cell[spy_started], minlength=cell_count),
+        'spy_started_locals_wins': np.zeros(cell_count, dtype=np.int64),
+        'total_rounds': np.zeros(cell_count, dtype=np.int64),
+    }
+
+    round_number = 0
+    while live_cell.size:
+        round_number += 1
+        hit_chance = accusation_hit_chance(spies, spies + locals_, skill)
+        if round_number == 1:
+            hit_chance = np.where(spy_started, np.minimum(1.0, hit_chance + spy_start_bonus), hit_chance)
+
+        hit = rng.random(live_cell.size, dtype=np.float32) < hit_chance
+        spies -= hit
+        locals_ -= ~hit
+
+        # Any caught Spy in Easy Mode gets a final guess chance
+        if game_mode == MODE_EASY:
+            guessed = hit & (rng.random(live_cell.size, dtype=np.float32) < guess_rate)
+        else:
+            guessed = np.zeros(live_cell.size, dtype=bool)
+
+        # check_win_conditions: no Spies left, or Spies reached parity
+        locals_won = ~guessed & (spies == 0)
+        spies_won = guessed | (~locals_won & (spies >= locals_))
+
+        counts['locals_wins'] += np.bincount(live_cell[locals_won], minlength=cell_count)
+        counts['spy_guess_wins'] += np.bincount(live_cell[guessed], minlength=cell_count)
+        counts['spy_started_locals_wins'] += np.bincount(live_cell[locals_won & spy_started], minlength=cell_count)
+
+        # Drop decided games so every round only touches the games still in play
+        decided = locals_won | spies_won
+        counts['total_rounds'] += round_number * np.bincount(live_cell[decided], minlength=cell_count)
+        live = ~decided
+        live_cell, spies, locals_, spy_started = live_cell[live], spies[live], locals_[live], spy_started[live]
+
+    return counts
+
+
+def _simulate_single_round(player_counts, spy_counts, games, skill, rng):
+    """Single Round: the town makes spy_count accusations and must name every Spy."""
+    cell_count = len(player_counts)
+    cell = np.repeat(np.arange(cell_count), games)
+    player_count = player_counts[cell]
+    spy_count = spy_counts[cell]
+
+    perfect = np.ones(cell.size, dtype=bool)
+    for picked in range(int(spy_counts.max())):
+        # Only games still perfect and with accusations left draw again;
+        # every earlier pick of a still-perfect game was a Spy
+        picking = np.flatnonzero(perfect & (picked < spy_count))
+        hit_chance = accusation_hit_chance(spy_count[picking] - picked, player_count[picking] - picked, skill)
+        perfect[picking] = rng.random(picking.size, dtype=np.float32) < hit_chance
+
+    return {
+        'locals_wins': np.bincount(cell[perfect], minlength=cell_count),
+        'spy_guess_wins': np.zeros(cell_count, dtype=np.int64),
+        'spy_started': np.zeros(cell_count, dtype=np.int64),
+        'spy_started_locals_wins': np.zeros(cell_count, dtype=np.int64),
+        'total_rounds': np.full(cell_count, games, dtype=np.int64),
+    }
+
+
+def iter_grid(min_players=MIN_PLAYERS, max_players=MAX_PLAYERS, game_modes=GAME_MODES):
+    """Yields every (player_count, spy_count, game_mode) cell of a sweep."""
+    for game_mode in game_modes:
+        for player_count in range(min_players, max_players + 1):
+            for spy_count in spy_counts_for(player_count):
+                yield player_count, spy_count, game_mode
+
+
+def build_shards(min_players=MIN_PLAYERS, max_players=MAX_PLAYERS, game_modes=GAME_MODES,
+                 skills=(DEFAULT_SKILL,), local_start_skews=(LOCAL_START_SKEW,),
+                 cells_per_shard=DEFAULT_CELLS_PER_SHARD):
+    """
+    Splits the player_count x spy_count x game_mode x skill (x start skew) grid
+    into shards of at most cells_per_shard cells that share one mode and model.
+    """
+    shards = []
+    for skill in skills:
+        for game_mode in game_modes:
+            # Single Round has no turn order, so the start skew does not apply
+            skews = (LOCAL_START_SKEW,) if game_mode == MODE_SINGLE_ROUND else local_start_skews
+            cells = [(p, s) for p, s, _ in iter_grid(min_players, max_players, (game_mode,))]
+            for local_start_skew in skews:
+                for start in range(0, len(cells), cells_per_shard):
+                    shards.append({
+                        'game_mode': game_mode,
+                        'skill': skill,
+                        'local_start_skew': local_start_skew,
+                        'cells': cells[start:start + cells_per_shard],
+                    })
+    return shards
+
+
+def run_shard(shard, seed_sequence, cell_options):
+    """Worker entry point: simulates one shard with its own deterministic random stream."""
+    rng = np.random.default_rng(seed_sequence)
+    results = simulate_cells(shard['cells'], shard['game_mode'], skill=shard['skill'],
+                             local_start_skew=shard['local_start_skew'], rng=rng, **cell_options)
+    for result in results:
+        result['skill'] = shard['skill']
+        result['local_start_skew'] = shard['local_start_skew']
+    return results
+
+
+def iter_sweep(shards, seed=None, workers=None, **cell_options):
+    """
+    Runs shards across a ProcessPoolExecutor and yields cell results as each shard
+    completes. Every shard draws from its own child of SeedSequence(seed), so the
+    results for a given seed do not depend on the worker count or completion order.
+    workers=1 runs the shards in-process.
+    """
+    seed_sequences = np.random.SeedSequence(seed).spawn(len(shards))
+
+    if workers == 1:
+        for shard, seed_sequence in zip(shards, seed_sequences):
+            yield from run_shard(shard, seed_sequence, cell_options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_shard, shard, seed_sequence, cell_options)
+            for shard, seed_sequence in zip(shards, seed_sequences)
+        ]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def sweep(min_players=MIN_PLAYERS, max_players=MAX_PLAYERS, game_modes=GAME_MODES, seed=None,
+          skill=DEFAULT_SKILL, local_start_skew=LOCAL_START_SKEW, workers=1, **cell_options):
+    """Runs every cell of the grid for one accuracy model and returns the list of cell results."""
+    shards = build_shards(min_players, max_players, game_modes, (skill,), (local_start_skew,))
+    results = list(iter_sweep(shards, seed=seed, workers=workers, **cell_options))
+    results.sort(key=lambda r: (GAME_MODES.index(r['game_mode']), r['player_count'], r['spy_count']))
+    return results
+
+
+def merge_result(totals, result):
+    """Streams one cell result into pooled totals keyed by (game_mode, skill, local_start_skew)."""
+    key = (result['game_mode'], result.get('skill', DEFAULT_SKILL), result.get('local_start_skew', LOCAL_START_SKEW))
+    pooled = totals.setdefault(key, {'games': 0, 'locals_wins': 0, 'spy_started': 0})
+    for field in pooled:
+        pooled[field] += result[field]
+    return totals
+
+
+def format_win_table(results, game_mode):
+    """Locals win-rate table for one mode: one row per player count, one column per spy count."""
+    cells = {(r['player_count'], r['spy_count']): r for r in results if r['game_mode'] == game_mode}
+    if not cells:
+        return ""
+    player_counts = sorted({p for p, _ in cells})
+    max_spies = max(s for _, s in cells)
+
+    lines = [f"{game_mode}: Locals win % (rows: players, columns: spies)"]
+    lines.append("players " + "".join(f"{s:>6}" for s in range(1, max_spies + 1)))
+    for player_count in player_counts:
+        row = f"{player_count:>7} "
+        for spy_count in range(1, max_spies + 1):
+            cell = cells.get((player_count, spy_count))
+            row += f"{100 * cell['locals_wins'] / cell['games']:>6.1f}" if cell else f"{'':>6}"
+        lines.append(row)
+    return "\n".join(lines)
+
+
+def format_pooled_report(totals):
+    """Pooled Locals win rate and Round 1 Spy start rate per mode, accuracy model and start skew."""
+    lines = ["Pooled over all cells (mode, skill, start skew):"]
+    for (game_mode, skill, local_start_skew), pooled in sorted(totals.items()):
+        games = pooled['games']
+        skew_text = "n/a " if game_mode == MODE_SINGLE_ROUND else f"{local_start_skew:.2f}"
+        lines.append(
+            f"  {game_mode:<12} skill {skill:.2f}  skew {skew_text}"
+            f"  spy starts {100 * pooled['spy_started'] / games:5.1f}%"
+            f"  Locals win {100 * pooled['locals_wins'] / games:5.1f}%"
+        )
+    return "\n".join(lines)
+
+
+def format_assumptions(guess_rate, spy_start_bonus):
+    """Report header naming the modelled (not measured) rates the results depend on."""
+    return "\n".join([
+        "Assumptions (model inputs, not measurements):",
+        f"  Easy Mode final guess success rate {guess_rate:.3f} (--guess-rate)",
+        f"  Spy start bonus +{spy_start_bonus:.2f} to the first accusation's hit chance when a Spy started Round 1"
+        " (--spy-start-bonus)",
+        "  The Round 1 start skew changes win rates only through the spy start bonus",
+    ])
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Monte Carlo balance simulator for Word Spyfall.")
+    parser.add_argument('--games', type=int, default=DEFAULT_GAMES, help="Games per grid cell.")
+    parser.add_argument('--min-players', type=int, default=MIN_PLAYERS)
+    parser.add_argument('--max-players', type=int, default=MAX_PLAYERS)
+    parser.add_argument('--modes', nargs='+', choices=GAME_MODES, default=list(GAME_MODES))
+    parser.add_argument('--skills', nargs='+', type=float, default=[DEFAULT_SKILL],
+                        help="Accusation accuracy models to sweep (0-1).")
+    parser.add_argument('--guess-rate', type=float, default=DEFAULT_GUESS_RATE, help="Easy Mode final guess success rate.")
+    parser.add_argument('--spy-start-bonus', type=float, default=DEFAULT_SPY_START_BONUS,
+                        help="Assumed extra chance to catch a Spy who started Round 1 in the first accusation.")
+    parser.add_argument('--no-skew-baseline', action='store_true',
+                        help="Skip the comparison run without the Round 1 Local start skew.")
+    parser.add_argument('--cells-per-shard', type=int, default=DEFAULT_CELLS_PER_SHARD)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (1 runs in-process).")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--csv', help="Stream per-cell results to this CSV file.")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    cell_options = dict(games=args.games, guess_rate=args.guess_rate, spy_start_bonus=args.spy_start_bonus)
+    skews = (LOCAL_START_SKEW,) if args.no_skew_baseline else (LOCAL_START_SKEW, 0.0)
+    shards = build_shards(args.min_players, args.max_players, args.modes, args.skills, skews, args.cells_per_shard)
+
+    # Merge results as shards finish: pooled totals and CSV rows never wait for the whole sweep
+    totals = {}
+    tables = {}
+    csv_file = open(args.csv, 'w', newline='') if args.csv else None
+    writer = None
+    try:
+        for result in iter_sweep(shards, seed=args.seed, workers=args.workers, **cell_options):
+            merge_result(totals, result)
+            if result['local_start_skew'] == LOCAL_START_SKEW:
+                tables.setdefault(result['skill'], []).append(result)
+            if csv_file:
+                if writer is None:
+                    writer = csv.DictWriter(csv_file, fieldnames=list(result.keys()))
+                    writer.writeheader()
+                writer.writerow(result)
+    finally:
+        if csv_file:
+            csv_file.close()
+
+    print(format_assumptions(args.guess_rate, args.spy_start_bonus))
+    print()
+    for skill, results in sorted(tables.items()):
+        print(f"=== Accusation skill {skill:.2f} ===")
+        for game_mode in args.modes:
+            print(format_win_table(results, game_mode))
+            print()
+    print(format_pooled_report(totals))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Timing and outcome instrumentation for AI generations.
+
+Every generation gets a Trace when it is requested. Spans are measured with
+perf_counter as the request moves through the pipeline:
+
+    queue       submit -> a pool worker starts the job
+    rate_limit  waiting for a token-bucket token
+    request     request sent -> response headers (includes connecting when a
+                new connection had to be opened; see 'new_connections')
+    transfer    response headers -> body fully read
+    backoff     waiting between retries
+    parse       decoding the generated JSON on the Kivy thread
+    handoff     Clock.schedule_once -> the callback running on the Kivy thread
+    first_word  submit -> first streamed word (streaming requests only)
+    total       submit -> result handled
+
+Spans that happen more than once per request (one per attempt) are summed.
+Finished traces are kept in a bounded in-memory log, aggregated for the
+in-app stats view and exported as JSON lines. Kivy-free.
+"""
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import nullcontext
+
+DEFAULT_HISTORY = 500 # Finished traces kept in memory
+SPANS = ('queue', 'rate_limit', 'request', 'transfer', 'backoff', 'parse', 'handoff', 'first_word', 'total')
+
+
+class Trace:
+    """One generation request's spans, counters and outcome."""
+
+    def __init__(self, telemetry, kind, category):
+        self.telemetry = telemetry
+        self.kind = kind
+        self.category = category
+        self.created = time.time()
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.counts = Counter()
+        self.marks = {}
+        self.outcome = None
+        self.words = None
+        self.cached = False
+
+    def add(self, span, seconds):
+        self.spans[span] = self.spans.get(span, 0.0) + seconds
+
+    def count(self, name, n=1):
+        self.counts[name] += n
+
+    def mark(self, name):
+        """Records a point in time; end(name) later turns it into a span."""
+        self.marks[name] = time.perf_counter()
+
+    def end(self, name):
+        started = self.marks.pop(name, None)
+        if started is not None:
+            self.add(name, time.perf_counter() - started)
+
+    def timed(self, span):
+        return _Span(self, span)
+
+    def finish(self, outcome, words=None, cached=False):
+        """Closes the trace (only the first call counts) and hands it to the Telemetry log."""
+        if self.outcome is not None:
+            return
+        self.outcome = outcome
+        self.words = words
+        self.cached = cached
+        self.add('total', time.perf_counter() - self.started)
+        self.telemetry.record(self)
+
+    def to_dict(self):
+        return {
+            'time': round(self.created, 3),
+            'kind': self.kind,
+            'category': self.category,
+            'outcome': self.outcome,
+            'cached': self.cached,
+            'words': self.words,
+            'spans_ms': {name: round(1000 * seconds, 2) for name, seconds in self.spans.items()},
+            'counts': dict(self.counts),
+        }
+
+
+class NullTrace:
+    """Stand-in for callers that are not tracing; every method is a no-op."""
+
+    def add(self, span, seconds):
+        pass
+
+    def count(self, name, n=1):
+        pass
+
+    def mark(self, name):
+        pass
+
+    def end(self, name):
+        pass
+
+    def timed(self, span):
+        return nullcontext()
+
+    def finish(self, outcome, words=None, cached=False):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class _Span:
+    __slots__ = ('trace', 'span', 'started')
+
+    def __init__(self, trace, span):
+        self.trace = trace
+        self.span = span
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.span, time.perf_counter() - self.started)
+        return False
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Telemetry:
+    """Thread-safe log of finished traces plus running counters."""
+
+    def __init__(self, history=DEFAULT_HISTORY):
+        self.lock = threading.Lock()
+        self.traces = deque(maxlen=history)
+        self.outcomes = Counter()
+        self.counts = Counter()
+        self.words_total = 0
+        self.responses_with_words = 0
+
+    def start(self, kind, category):
+        return Trace(self, kind, category)
+
+    def increment(self, name, n=1):
+        """Counts an event that has no trace of its own (e.g. a deduplicated request)."""
+        with self.lock:
+            self.counts[name] += n
+
+    def record(self, trace):
+        with self.lock:
+            self.traces.append(trace.to_dict())
+            self.outcomes[trace.outcome] += 1
+            self.counts.update(trace.counts)
+            if trace.words is not None:
+                self.words_total += trace.words
+                self.responses_with_words += 1
+
+    def summary(self):
+        """Aggregates for the stats view: outcomes, counters, words per response and span percentiles (ms)."""
+        with self.lock:
+            traces = list(self.traces)
+            summary = {
+                'requests': sum(self.outcomes.values()),
+                'outcomes': dict(self.outcomes),
+                'counts': dict(self.counts),
+                'words_per_response': round(self.words_total / self.responses_with_words, 1) if self.responses_with_words else 0.0,
+            }
+
+        spans = {}
+        for name in SPANS:
+            values = sorted(t['spans_ms'][name] for t in traces if name in t['spans_ms'])
+            if values:
+                spans[name] = {
+                    'p50': percentile(values, 0.5),
+                    'p95': percentile(values, 0.95),
+                    'max': values[-1],
+                }
+        summary['spans_ms'] = spans
+        return summary
+
+    def export_jsonl(self, path):
+        """Writes every trace in the log to path, one JSON object per line. Returns the count written."""
+        with self.lock:
+            traces = list(self.traces)
+        with open(path, 'w', encoding='utf-8') as f:
+            for trace in traces:
+                f.write(json.dumps(trace) + '\n')
+        return len(traces)
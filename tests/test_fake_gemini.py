@@ -0,0 +1,111 @@
+"""Regression checks for the Gemini request path against fake_gemini's local server."""
+import json
+import threading
+
+import pytest
+
+import fake_gemini
+from gemini_client import GeminiClient, GeminiError, TokenBucket, WordStreamParser, event_text
+from response_cache import ResponseCache
+
+
+def start(**faults):
+    server, base_url = fake_gemini.start_in_background(port=0, faults=fake_gemini.FaultConfig(**faults))
+    return server, base_url, f"{base_url}/v1beta/models/{fake_gemini.DEFAULT_MODEL}:generateContent?key=test"
+
+
+def client(max_retries=3):
+    # No client-side throttling and near-zero backoff keep the retries fast
+    return GeminiClient(max_retries=max_retries, rate_limiter=TokenBucket(rate=1e9, capacity=100), backoff_base=0.001)
+
+
+def words_of(response_data):
+    return json.loads(response_data['candidates'][0]['content']['parts'][0]['text'])['words']
+
+
+def test_normal_response_parses_into_words():
+    server, _, url = start(seed=1)
+    try:
+        words = words_of(client().post_json(url, fake_gemini.bench_payload('Space')))
+    finally:
+        server.shutdown()
+    assert len(words) == fake_gemini.WORDS_PER_CATEGORY
+    assert all(word.startswith('Space Item') for word in words)
+
+
+def test_throttled_requests_are_retried_until_words_arrive():
+    server, _, url = start(throttle_rate=0.5, retry_after=0, seed=3)
+    gemini = client(max_retries=6)
+    try:
+        results = [words_of(gemini.post_json(url, fake_gemini.bench_payload('Space'))) for _ in range(10)]
+    finally:
+        server.shutdown()
+    assert server.faults.counts['throttled'] > 0
+    assert gemini.state()['throttled'] == server.faults.counts['throttled']
+    assert all(len(words) == fake_gemini.WORDS_PER_CATEGORY for words in results)
+
+
+def test_persistent_throttling_fails_after_the_retries():
+    server, _, url = start(throttle_rate=1.0, retry_after=0)
+    try:
+        with pytest.raises(GeminiError):
+            client(max_retries=3).post_json(url, fake_gemini.bench_payload('Space'))
+    finally:
+        server.shutdown()
+    assert server.faults.counts['throttled'] == 3
+
+
+def test_malformed_payload_is_detected():
+    server, _, url = start(malformed_rate=1.0)
+    try:
+        response_data = client().post_json(url, fake_gemini.bench_payload('Space'))
+    finally:
+        server.shutdown()
+    with pytest.raises(ValueError):
+        words_of(response_data)
+
+
+def test_streamed_non_ascii_words_arrive_intact():
+    server, base_url, _ = start(seed=4)
+    url = f"{base_url}/v1beta/models/{fake_gemini.DEFAULT_MODEL}:streamGenerateContent?alt=sse&key=test"
+    parser = WordStreamParser()
+    words = []
+    try:
+        for event in client().stream_events(url, fake_gemini.bench_payload('Café Crème 東京')):
+            words.extend(parser.feed(event_text(event)))
+    finally:
+        server.shutdown()
+    assert len(words) == fake_gemini.WORDS_PER_CATEGORY
+    assert all(word.startswith('Café Crème 東京 Item') for word in words)
+    assert json.loads(parser.full_text())['words'] == words
+
+
+def test_non_ascii_words_arrive_intact():
+    server, _, url = start(seed=4)
+    try:
+        words = words_of(client().post_json(url, fake_gemini.bench_payload('Café Crème')))
+    finally:
+        server.shutdown()
+    assert all(word.startswith('Café Crème Item') for word in words)
+
+
+def test_app_payload_round_trip(tmp_path, monkeypatch):
+    """The app's own payload and parsing (SpyGame.call_gemini_api / parse_gemini_json); needs Kivy."""
+    pytest.importorskip('kivy')
+    import main
+
+    server, base_url, _ = start(seed=2)
+    monkeypatch.setattr(main, 'GEMINI_API_BASE', base_url)
+    game = main.SpyGame.__new__(main.SpyGame) # The request path needs no widgets
+    game.session_api_key = 'test'
+    game.gemini_client = client()
+    game.response_cache = ResponseCache(str(tmp_path / 'cache.db'))
+    try:
+        response_data, cached = game.call_gemini_api(threading.Event(), 'Space')
+        again, cached_again = game.call_gemini_api(threading.Event(), 'Space')
+    finally:
+        server.shutdown()
+        game.response_cache.close()
+    assert not cached and cached_again
+    assert game.parse_gemini_json(response_data)['words'] == game.parse_gemini_json(again)['words']
+    assert len(game.parse_gemini_json(response_data)['words']) == fake_gemini.WORDS_PER_CATEGORY
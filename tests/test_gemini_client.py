@@ -0,0 +1,51 @@
+"""WordStreamParser against JSON split into arbitrary fragments."""
+import json
+
+from gemini_client import WordStreamParser
+
+DOCUMENT = json.dumps({"words": ["Mars", "Halley's \"Comet\"", "Große Bär", "  ", "Sun\\Moon"]}, ensure_ascii=True)
+EXPECTED = ["Mars", "Halley's \"Comet\"", "Große Bär", "Sun\\Moon"]
+
+
+def feed_all(chunks):
+    parser = WordStreamParser()
+    words = []
+    for chunk in chunks:
+        words.extend(parser.feed(chunk))
+    return parser, words
+
+
+def test_whole_document():
+    parser, words = feed_all([DOCUMENT])
+    assert words == EXPECTED
+    assert json.loads(parser.full_text()) == json.loads(DOCUMENT)
+
+
+def test_every_split_point():
+    # Splits inside keys, words, escapes and \uXXXX sequences must not change the result
+    for i in range(len(DOCUMENT) + 1):
+        _, words = feed_all([DOCUMENT[:i], DOCUMENT[i:]])
+        assert words == EXPECTED, i
+
+
+def test_single_character_chunks():
+    parser, words = feed_all(list(DOCUMENT))
+    assert words == EXPECTED
+    assert parser.full_text() == DOCUMENT
+
+
+def test_words_are_returned_as_soon_as_they_close():
+    parser = WordStreamParser()
+    assert parser.feed('{"words": ["Ma') == []
+    assert parser.feed('rs", "Ven') == ["Mars"]
+    assert parser.feed('us"') == ["Venus"]
+
+
+def test_truncated_document_keeps_completed_words():
+    _, words = feed_all([DOCUMENT[:DOCUMENT.index("Sun")]])
+    assert words == EXPECTED[:3]
+
+
+def test_keys_and_strings_outside_arrays_are_ignored():
+    _, words = feed_all(['{"note": "x", "words": ["a"], "other": ["b", ["c"]]}'])
+    assert words == ["a", "b", "c"]
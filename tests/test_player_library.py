@@ -0,0 +1,55 @@
+"""LibraryStore journal replay and crash safety."""
+import pytest
+
+import player_library
+from player_library import LibraryStore
+
+
+def journaled(tmp_path, compact_every=100):
+    return LibraryStore(str(tmp_path / 'players.json'), journal=True, compact_every=compact_every)
+
+
+def test_journal_replays_over_snapshot(tmp_path):
+    store = journaled(tmp_path)
+    store.load()
+    store.record_add('Ann', {'wins': 1})
+    store.record_add('Bob', {'wins': 0})
+    store.flush({'Ann': {'wins': 1}, 'Bob': {'wins': 0}})
+    store.record_remove('Bob')
+    store.flush({'Ann': {'wins': 1}})
+    assert journaled(tmp_path).load() == {'Ann': {'wins': 1}}
+
+
+def test_crash_between_snapshot_and_journal_truncate(tmp_path, monkeypatch):
+    # The journal holds 'add X'; the compacting flush removes X and adds Y
+    store = journaled(tmp_path, compact_every=2)
+    store.load()
+    store.record_add('X', {})
+    store.flush({'X': {}})
+    store.record_remove('X')
+    store.record_add('Y', {})
+
+    write_atomic = player_library.write_atomic
+    def write_then_crash(path, data):
+        write_atomic(path, data)
+        raise SystemExit('crash')
+    monkeypatch.setattr(player_library, 'write_atomic', write_then_crash)
+    with pytest.raises(SystemExit):
+        store.flush({'Y': {}})
+
+    assert journaled(tmp_path).load() == {'Y': {}}
+
+
+def test_torn_line_is_cut_before_appending(tmp_path):
+    store = journaled(tmp_path)
+    store.load()
+    store.record_add('Ann', {})
+    store.flush({'Ann': {}})
+    with open(store.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "na')
+
+    store = journaled(tmp_path)
+    assert store.load() == {'Ann': {}}
+    store.record_add('Bob', {})
+    store.flush({'Ann': {}, 'Bob': {}})
+    assert journaled(tmp_path).load() == {'Ann': {}, 'Bob': {}}
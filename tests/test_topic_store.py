@@ -0,0 +1,43 @@
+"""TopicCatalogue decoy sampling over loaded and unloaded categories."""
+import random
+from collections import Counter
+
+from topic_store import TopicCatalogue, TopicStore
+
+
+def catalogue(tmp_path):
+    store = TopicStore(str(tmp_path / 'topics.db'))
+    store.put_category('Stored', [f"s{i}" for i in range(30)])
+    store.put_category('Current', ['c0', 'c1'])
+    return TopicCatalogue(store, defaults={'Default': [f"d{i}" for i in range(10)]})
+
+
+def test_decoys_come_from_other_categories_without_loading_them(tmp_path):
+    topics = catalogue(tmp_path)
+    words = topics.sample_outside('Current', k=5, rng=random.Random(1))
+    assert len(set(words)) == 5
+    assert not any(word.startswith('c') for word in words)
+    assert not topics.is_loaded('Stored')
+
+
+def test_decoys_are_weighted_by_word_count(tmp_path):
+    # 'Stored' holds 30 of the 40 outside words, loaded or not
+    topics = catalogue(tmp_path)
+    rng = random.Random(7)
+    drawn = Counter(word[0] for _ in range(2000) for word in topics.sample_outside('Current', k=1, rng=rng))
+    assert 0.68 < drawn['s'] / 2000 < 0.82
+
+
+def test_fewer_outside_words_than_requested(tmp_path):
+    topics = catalogue(tmp_path)
+    topics['Stored'] = []
+    assert sorted(topics.sample_outside('Current', k=50)) == sorted(f"d{i}" for i in range(10))
+
+
+def test_edited_and_added_categories_are_sampled(tmp_path):
+    topics = catalogue(tmp_path)
+    topics['Default'] = ['x0']
+    topics['Added'] = ['a0', 'a1']
+    topics['Stored'] = []
+    assert sorted(topics.sample_outside('Current', k=50)) == ['a0', 'a1', 'x0']
+    assert sorted(topics.sample_outside('Added', k=50)) == ['c0', 'c1', 'x0']
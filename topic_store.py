@@ -0,0 +1,260 @@
+"""
+SQLite-backed storage for topic categories and their words.
+
+Replaces the single JsonStore document that was rewritten in full every time
+a category was accepted. Each category is a row in `categories` and its words
+are rows in `words`, so saving one category only touches that category.
+The old topic_data.json JsonStore file is imported once on first open.
+
+TopicCatalogue sits on top of the store and keeps only category names and
+word counts in memory until a category is actually needed. The spy's
+outside-category decoys are drawn by word position over those counts, and a
+word of a category that is not paged in is read with a single-row query, so
+every stored word is equally likely however few categories are loaded.
+"""
+import bisect
+import json
+import os
+import random
+import sqlite3
+from collections.abc import Mapping
+from itertools import accumulate
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    word_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS words (
+    category_id INTEGER NOT NULL REFERENCES categories(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    PRIMARY KEY (category_id, position)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+JSON_MIGRATED_KEY = 'json_migrated'
+
+
+class TopicStore:
+    """Categories and words in SQLite, with a one-time import of the legacy JsonStore file."""
+
+    def __init__(self, path, legacy_json_path=None):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        if legacy_json_path:
+            self.migrate_from_json(legacy_json_path)
+
+    def close(self):
+        self.conn.close()
+
+    # --- Migration ---
+    def migrate_from_json(self, json_path):
+        """Imports topics saved by the old JsonStore backend ({'topics': {'topics': {...}}}) once."""
+        if self._get_meta(JSON_MIGRATED_KEY) or not os.path.exists(json_path):
+            return 0
+
+        try:
+            with open(json_path, encoding='utf-8') as f:
+                stored_topics = json.load(f).get('topics', {}).get('topics', {})
+        except (OSError, ValueError):
+            stored_topics = {}
+
+        with self.conn:
+            for category_name, words in stored_topics.items():
+                self._put_category(category_name, words)
+            self._set_meta(JSON_MIGRATED_KEY, json_path)
+        return len(stored_topics)
+
+    # --- Reads ---
+    def category_counts(self):
+        """Returns {category: word_count} without loading any words."""
+        return dict(self.conn.execute("SELECT name, word_count FROM categories ORDER BY id"))
+
+    def has_category(self, category_name):
+        return self.conn.execute(
+            "SELECT 1 FROM categories WHERE name = ?", (category_name,)
+        ).fetchone() is not None
+
+    def get_words(self, category_name):
+        rows = self.conn.execute(
+            "SELECT w.word FROM words w JOIN categories c ON c.id = w.category_id "
+            "WHERE c.name = ? ORDER BY w.position",
+            (category_name,)
+        )
+        return [row[0] for row in rows]
+
+    def word_at(self, category_name, position):
+        """One word of a category by position (primary-key lookup), or None."""
+        row = self.conn.execute(
+            "SELECT w.word FROM words w JOIN categories c ON c.id = w.category_id "
+            "WHERE c.name = ? AND w.position = ?",
+            (category_name, position)
+        ).fetchone()
+        return row[0] if row else None
+
+    def load_all(self):
+        """Returns every stored category as {category: [words]}."""
+        topics = {name: [] for name in self.category_counts()}
+        rows = self.conn.execute(
+            "SELECT c.name, w.word FROM words w JOIN categories c ON c.id = w.category_id "
+            "ORDER BY c.id, w.position"
+        )
+        for category_name, word in rows:
+            topics[category_name].append(word)
+        return topics
+
+    # --- Writes ---
+    def put_category(self, category_name, words):
+        """Saves (inserts or replaces) a single category in one transaction."""
+        with self.conn:
+            self._put_category(category_name, words)
+
+    def append_words(self, category_name, words):
+        """Adds words after a category's existing ones (creating it if needed) in one transaction."""
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT id, word_count FROM categories WHERE name = ?", (category_name,)
+            ).fetchone()
+            if row is None:
+                self._put_category(category_name, words)
+                return
+            category_id, word_count = row
+            self.conn.executemany(
+                "INSERT INTO words (category_id, position, word) VALUES (?, ?, ?)",
+                [(category_id, word_count + offset, word) for offset, word in enumerate(words)]
+            )
+            self.conn.execute(
+                "UPDATE categories SET word_count = ? WHERE id = ?", (word_count + len(words), category_id)
+            )
+
+    def delete_category(self, category_name):
+        with self.conn:
+            self.conn.execute("DELETE FROM categories WHERE name = ?", (category_name,))
+
+    def _put_category(self, category_name, words):
+        self.conn.execute(
+            "INSERT INTO categories (name, word_count) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET word_count = excluded.word_count",
+            (category_name, len(words))
+        )
+        category_id = self.conn.execute(
+            "SELECT id FROM categories WHERE name = ?", (category_name,)
+        ).fetchone()[0]
+        self.conn.execute("DELETE FROM words WHERE category_id = ?", (category_id,))
+        self.conn.executemany(
+            "INSERT INTO words (category_id, position, word) VALUES (?, ?, ?)",
+            [(category_id, position, word) for position, word in enumerate(words)]
+        )
+
+    def _get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+class TopicCatalogue(Mapping):
+    """
+    {category: [words]} view over the default topics and a TopicStore that only
+    loads category names and word counts up front. A stored category's words
+    are paged in the first time it is looked up, and every on_load callback is
+    called with (category_name, words) when that happens.
+    """
+
+    def __init__(self, store, defaults=None):
+        self.store = store
+        self.loaded = {}
+        self.counts = {}
+        self.on_load = []
+
+        for category_name, words in (defaults or {}).items():
+            self.loaded[category_name] = words
+            self.counts[category_name] = len(words)
+        for category_name, word_count in store.category_counts().items():
+            # Stored categories (including user edits) override the defaults
+            self.loaded.pop(category_name, None)
+            self.counts[category_name] = word_count
+
+        # Running word totals in counts order, so sample_outside only has to bisect
+        self.names = list(self.counts)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.cumulative = list(accumulate(self.counts.values()))
+
+    def __getitem__(self, category_name):
+        words = self.loaded.get(category_name)
+        if words is None:
+            if category_name not in self.counts:
+                raise KeyError(category_name)
+            words = self.loaded[category_name] = self.store.get_words(category_name)
+            for callback in self.on_load:
+                callback(category_name, words)
+        return words
+
+    def __setitem__(self, category_name, words):
+        i = self.positions.get(category_name)
+        if i is None:
+            self.positions[category_name] = len(self.names)
+            self.names.append(category_name)
+            self.cumulative.append((self.cumulative[-1] if self.cumulative else 0) + len(words))
+        else:
+            change = len(words) - self.counts[category_name]
+            for j in range(i, len(self.cumulative)):
+                self.cumulative[j] += change
+        self.loaded[category_name] = words
+        self.counts[category_name] = len(words)
+
+    def __contains__(self, category_name):
+        return category_name in self.counts
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def word_count(self, category_name):
+        """Number of words in a category, without loading it."""
+        return self.counts[category_name]
+
+    def is_loaded(self, category_name):
+        return category_name in self.loaded
+
+    def loaded_topics(self):
+        """The categories whose words are already in memory."""
+        return dict(self.loaded)
+
+    def sample_outside(self, category_name, k, rng=random):
+        """
+        Up to k words drawn uniformly from the words of every other category,
+        weighting categories by their word counts. Categories that are not
+        paged in are read one word at a time instead of being loaded.
+        """
+        cumulative = self.cumulative
+        total = cumulative[-1] if cumulative else 0
+        # The excluded category's words are the range [start, end) of the running totals
+        i = self.positions.get(category_name)
+        end = cumulative[i] if i is not None else 0
+        start = end - self.counts[category_name] if i is not None else 0
+        skipped = end - start
+
+        words = []
+        for index in rng.sample(range(total - skipped), min(k, total - skipped)):
+            if index >= start:
+                index += skipped
+            i = bisect.bisect_right(cumulative, index)
+            name = self.names[i]
+            position = index - (cumulative[i - 1] if i else 0)
+            loaded = self.loaded.get(name)
+            word = loaded[position] if loaded is not None else self.store.word_at(name, position)
+            if word is not None:
+                words.append(word)
+        return words
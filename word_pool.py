@@ -0,0 +1,108 @@
+"""
+Secret word selection for Word Spyfall.
+
+Each category gets a WordDeck: a shuffled deck with a cursor, so picking an
+unused word is O(1) instead of rebuilding "all words minus used words" for
+every game.
+Kivy-free, so the engine tooling can use it as well.
+"""
+import random
+
+
+class WordDeck:
+    """
+    Deck over one category's words. Words before the cursor have been used
+    this session; draw() runs one step of an incremental Fisher-Yates shuffle
+    over the rest. When every word has been used the deck starts over
+    (the "reset pool when exhausted" rule).
+    """
+    __slots__ = ('words', 'cursor', 'rng')
+
+    def __init__(self, words, rng=None):
+        # Duplicate words only count once, as with the old set-based pool
+        self.words = list(dict.fromkeys(words))
+        self.cursor = 0
+        self.rng = rng or random.Random()
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def remaining(self):
+        """Words not yet used since the last reset."""
+        return len(self.words) - self.cursor
+
+    def draw(self):
+        """Returns a random unused word in O(1), resetting the deck if it is exhausted."""
+        if not self.words:
+            raise IndexError("Cannot draw from an empty word deck.")
+        if self.cursor >= len(self.words):
+            # All words have been used, reset the pool for this category
+            self.cursor = 0
+
+        j = self.rng.randrange(self.cursor, len(self.words))
+        words = self.words
+        words[self.cursor], words[j] = words[j], words[self.cursor]
+        word = words[self.cursor]
+        self.cursor += 1
+        return word
+
+    def reset(self):
+        self.cursor = 0
+
+    def extend(self, words):
+        """Adds new words as unused, keeping this session's used words used. Returns how many were new."""
+        known = set(self.words)
+        added = [word for word in dict.fromkeys(words) if word not in known]
+        # Everything from the cursor on is the unused part of the deck, so appending keeps them drawable
+        self.words.extend(added)
+        return len(added)
+
+
+class WordPool:
+    """
+    Per-category WordDecks over a topics mapping ({category: [words]}).
+    Decks are built the first time a category is drawn or inspected.
+    """
+
+    def __init__(self, topics, rng=None):
+        self.topics = topics
+        self.rng = rng or random.Random()
+        self.decks = {}
+
+    def deck(self, category):
+        deck = self.decks.get(category)
+        if deck is None:
+            deck = self.decks[category] = WordDeck(self.topics[category], self.rng)
+        return deck
+
+    def draw(self, category):
+        return self.deck(category).draw()
+
+    def remaining(self, category):
+        deck = self.decks.get(category)
+        return deck.remaining if deck is not None else self.total(category)
+
+    def total(self, category):
+        deck = self.decks.get(category)
+        if deck is not None:
+            return len(deck)
+        # Categories that have not been drawn yet are counted without paging in their words
+        word_count = getattr(self.topics, 'word_count', None)
+        return word_count(category) if word_count else len(set(self.topics[category]))
+
+    def replace(self, category, words):
+        """Starts a fresh deck after a category's word list has been replaced."""
+        self.decks[category] = WordDeck(words, self.rng)
+
+    def add_words(self, category, words):
+        """Merges words into a category's deck without resetting its used words."""
+        deck = self.decks.get(category)
+        if deck is not None:
+            deck.extend(words)
+
+    def reset(self):
+        """Forgets every used word (all decks start over)."""
+        for deck in self.decks.values():
+            deck.reset()
+